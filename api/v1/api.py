@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from api.v1.endpoints import user, auth, sessions, role, team, resource, permission, rbac, visibility_group
+from api.v1.endpoints import user, auth, sessions, role, team, resource, permission, rbac, visibility_group, jwks, metrics, policy
 
 __all__ = (
     "router",
@@ -15,3 +15,7 @@ router.include_router(resource.router, tags=['resource'], prefix="/api/auth/v1")
 router.include_router(permission.router, tags=['permission'], prefix="/api/auth/v1")
 router.include_router(rbac.router, tags=['rbac'], prefix="/api/auth/v1")
 router.include_router(visibility_group.router, tags=['visibility_group'], prefix="/api/auth/v1")
+router.include_router(jwks.router, tags=['jwks'])
+router.include_router(jwks.router, tags=['jwks'], prefix="/api/auth/v1")
+router.include_router(policy.router, tags=['policy'], prefix="/api/auth/v1")
+router.include_router(metrics.router, tags=['metrics'], prefix="/api/auth/v1")
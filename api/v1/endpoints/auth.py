@@ -1,12 +1,13 @@
 # # Native # #
 import os
+import uuid
 from datetime import timedelta
 from enum import Enum
-from typing import Any, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 from urllib.parse import urlparse, parse_qs
 
 # # Installed # #
-from fastapi import APIRouter, Body, Depends, Request, Header, Response
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, Request, Header, Response
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from fastapi_sso.sso.base import SSOBase
 from fastapi_sso.sso.google import GoogleSSO
@@ -16,7 +17,10 @@ from pydantic.networks import AnyHttpUrl
 
 # # Package # #
 from core.database.session import get_session
-from core.security import create_jwt_token, verify_jwt_token, create_cookie
+from core.security import (
+    create_jwt_token, access_token_claims, verify_jwt_token, verify_jwt_tokens, create_cookie, verify_cookie,
+    token_digest, get_unverified_claims
+)
 from core.settings import settings
 from core.logger import logger
 from core.exceptions import ConflictException, NotFoundException, UnauthorizedException, BadRequestException
@@ -25,7 +29,7 @@ from core.base.schema import IPostResponseBase, IGetResponseBase
 from app.model import User
 from app.user.util import get_current_user
 from app.user.schema import ICreate, IIdentityProvider, IAuthMeta
-from app.token.schema import Token, RefreshToken
+from app.token.schema import Token, RefreshToken, ITokenVerifyBatch, ITokenVerifyResult
 from app.sessions.model import Sessions
 from app import crud
 from core.sso_providers import get_user_info_from_sso_provider, KeycloakSSO
@@ -80,27 +84,23 @@ def get_sso_provider(provider: SSOProvider) -> SSOBase:
             raise NotFoundException(detail="Provider not found")
 
 
-def create_token_and_session(
+async def create_token_and_session(
     user,
     request: Request,
     response: Response) -> Tuple[Token, Sessions, IAuthMeta]:
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     refresh_token_expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    session_id = uuid.uuid4()
 
-    access_token, expires_at = create_jwt_token({
-        "user_id": str(user.id),
-        "email": user.email,
-        "roles": {str(i.id): i.title for i in user.roles},
-        "teams": [str(i.id) for i in user.teams],
-        "visibility_group": user.visibility_group.prefix if user.visibility_group else None
-    }, expires_delta=access_token_expires, token_type="access")
+    access_token, expires_at = await create_jwt_token(
+        access_token_claims(user), expires_delta=access_token_expires, token_type="access", session_id=session_id)
 
-    refresh_token, _ = create_jwt_token({
+    refresh_token, _ = await create_jwt_token({
         "user_id": str(user.id)
-    }, expires_delta=refresh_token_expires, token_type="refresh")
+    }, expires_delta=refresh_token_expires, token_type="refresh", session_id=session_id)
 
     cookie = request.cookies.get("auth")
-    if not cookie:
+    if not verify_cookie(cookie):
         cookie = create_cookie()
         response.set_cookie(key="auth", value=cookie, httponly=True, secure=True)
 
@@ -113,11 +113,12 @@ def create_token_and_session(
     )
 
     session = Sessions(
-        access_token=access_token,
-        refresh_token=refresh_token,
+        id=session_id,
+        access_token_digest=token_digest(access_token),
+        refresh_token_digest=token_digest(refresh_token),
         user_id=user.id,
         expires_at=expires_at,
-        cookie=cookie
+        cookie=verify_cookie(cookie)
     )
 
     meta = IAuthMeta.parse_obj(user)
@@ -127,12 +128,14 @@ def create_token_and_session(
 
 async def refresh_user_sessions(user: User, request: Request, db_session: AsyncSession, session: Sessions):
     if user.sessions:
-        for i in user.sessions:
-            if i.cookie == request.cookies.get("auth"):
-                await crud.sessions.remove(db_session, id=i.id)
-        if len(user.sessions) >= AMOUNT_OF_SESSSIONS_PER_USER:
+        removed = []
+        cookie_id = verify_cookie(request.cookies.get("auth"))
+        if cookie_id:
+            removed = await crud.sessions.remove_by_cookie(db_session, cookie_id=cookie_id, user_id=user.id)
+        sessions = [i for i in user.sessions if i.id not in {j.id for j in removed}]
+        if len(sessions) >= AMOUNT_OF_SESSSIONS_PER_USER:
             oldest_session = sorted(
-                user.sessions, key=lambda x: x.created_at)[0]
+                sessions, key=lambda x: x.created_at)[0]
             await crud.sessions.remove(db_session, id=oldest_session.id)
     await crud.sessions.create(db_session, obj_in=session)
 
@@ -142,11 +145,16 @@ async def refresh_user_sessions(user: User, request: Request, db_session: AsyncS
     409: {
         "content": {"application/json": {"example": {"detail": "User is disabled"}}},
         "description": "Additional information about the error",
+    },
+    429: {
+        "content": {"application/json": {"example": {"detail": "Too many login attempts"}}},
+        "description": "Login attempts of the email or client exceed the rate limit",
     }
 })
 async def basic(
     response: Response,
     request: Request,
+    background_tasks: BackgroundTasks,
     db_session: AsyncSession = Depends(get_session),
     form_data: OAuth2PasswordRequestForm = Depends(),
     # meta_data: IMetaGeneral = Depends(get_general_meta) # TODO return available roles
@@ -154,8 +162,14 @@ async def basic(
     """
     Basic login for test users only. Disabled for rest of the users.
     """
-    user = await crud.user.authenticate(db_session, email=form_data.username, password=form_data.password)
-    data, session, meta = create_token_and_session(user, request, response)
+    user = await crud.user.authenticate(
+        db_session,
+        email=form_data.username,
+        password=form_data.password,
+        client_ip=request.client.host if request.client else None,
+        background_tasks=background_tasks
+    )
+    data, session, meta = await create_token_and_session(user, request, response)
     await refresh_user_sessions(user, request, db_session, session)
     return IPostResponseBase[Token](meta=meta, data=data, message="Login correctly")
 
@@ -184,10 +198,12 @@ async def logout(
     current_user: User = Depends(get_current_user()),
     access_token: str = Depends(reusable_oauth2)
 ):
-    if current_user.sessions:
-        for i in current_user.sessions:
-            if i.cookie == request.cookies.get("auth") or i.access_token == access_token:
-                await crud.sessions.remove(db_session, id=i.id)
+    cookie_id = verify_cookie(request.cookies.get("auth"))
+    if cookie_id:
+        await crud.sessions.remove_by_cookie(db_session, cookie_id=cookie_id, user_id=current_user.id)
+    session = await crud.sessions.get_by_access_token(db_session, access_token=access_token)
+    if session and session.user_id == current_user.id:
+        await crud.sessions.remove(db_session, id=session.id)
     return IGetResponseBase(data={})
 
 @router.get("/auth/{provider}", status_code=303)
@@ -277,7 +293,7 @@ async def auth_callback(
     elif not user.is_active:
         raise ConflictException(detail="user is disabled")
 
-    data, session, meta = create_token_and_session(user, request, response)
+    data, session, meta = await create_token_and_session(user, request, response)
     await refresh_user_sessions(user, request, db_session, session)
 
     return IGetResponseBase[Token](meta=meta, data=data, message="Login correctly")
@@ -316,17 +332,15 @@ async def refresh_token(
         raise NotFoundException(detail="User not found")
     elif not user.is_active:
         raise ConflictException(detail="User is disabled")
-    if not user.sessions:
+    # the refresh token is verified, its `sid` resolves the session by primary key
+    session = await crud.sessions.get_by_refresh_token(
+        db_session, refresh_token=body.refresh_token, session_id=get_unverified_claims(body.refresh_token).get("sid"))
+    if not session or session.user_id != user.id:
         raise UnauthorizedException(detail="The session does not exist")
     access_token_expires = timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token, expires_at = create_jwt_token({
-        "user_id": str(user.id),
-        "email": user.email,
-        "roles": {str(i.id): i.title for i in user.roles},
-        "teams": [str(i.id) for i in user.teams],
-        "visibility_group": user.visibility_group.prefix if user.visibility_group else None
-    }, expires_delta=access_token_expires, token_type="access")
+    access_token, expires_at = await create_jwt_token(
+        access_token_claims(user), expires_delta=access_token_expires, token_type="access", session_id=session.id)
     data = Token(
         access_token=access_token,
         token_type="bearer",
@@ -334,25 +348,35 @@ async def refresh_token(
         refresh_token=body.refresh_token
     )
     meta = IAuthMeta.parse_obj(user)
-    cookie = request.cookies.get("auth")
-    for s in user.sessions:
-        if s.refresh_token == body.refresh_token:
-            if not cookie:
-                if s.cookie:
-                    cookie = s.cookie
-                    response.set_cookie(
-                        key="auth", value=cookie, httponly=True, secure=True)
-                else:
-                    cookie = create_cookie()
-                    response.set_cookie(
-                        key="auth", value=cookie, httponly=True, secure=True)
-            await crud.sessions.update(db_session, obj_current=s, obj_new={
-                "access_token": access_token,
-                "expires_at": expires_at,
-                cookie: cookie
-            })
-            return IPostResponseBase[Token](meta=meta, data=data, message="Access token generated correctly")
-    raise UnauthorizedException(detail="The session does not exist")
+    cookie_id = verify_cookie(request.cookies.get("auth"))
+    if not cookie_id:
+        # reissue the cookie the session was opened with
+        cookie = create_cookie(session.cookie or None)
+        response.set_cookie(
+            key="auth", value=cookie, httponly=True, secure=True)
+        cookie_id = verify_cookie(cookie)
+    await crud.sessions.refresh_access_token(
+        db_session, session=session, access_token=access_token, expires_at=expires_at, cookie=cookie_id)
+    return IPostResponseBase[Token](meta=meta, data=data, message="Access token generated correctly")
+
+
+@router.post("/auth/verify/batch", response_model=IGetResponseBase[List[ITokenVerifyResult]], status_code=200)
+async def verify_batch(
+    body: ITokenVerifyBatch,
+    db_session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user(required_permissions=True)),
+):
+    """
+    Verify up to TOKEN_VERIFY_BATCH_LIMIT access tokens at once, claims or error per token in request order.
+    The caller needs an access token with permission on this endpoint.
+    """
+    results = await verify_jwt_tokens(body.tokens, db_session=db_session, crud=crud)
+    data = [
+        ITokenVerifyResult(valid=False, detail=i.detail) if isinstance(i, UnauthorizedException)
+        else ITokenVerifyResult(valid=True, claims=i)
+        for i in results
+    ]
+    return IGetResponseBase[List[ITokenVerifyResult]](data=data, message="Tokens verified")
 
 
 @router.post("/auth/identity-provider", response_model=IPostResponseBase[Token], status_code=200)
@@ -380,7 +404,7 @@ async def idp(
     elif not user.is_active:
         raise ConflictException(detail="user is disabled")
 
-    data, session, meta = create_token_and_session(user, request, response)
+    data, session, meta = await create_token_and_session(user, request, response)
     await refresh_user_sessions(user, request, db_session, session)
 
     return IGetResponseBase[Token](meta=meta, data=data, message="Login correctly")
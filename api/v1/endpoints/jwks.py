@@ -0,0 +1,28 @@
+# # Native # #
+
+# # Installed # #
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import JSONResponse
+
+# # Package # #
+from core.security import keyring
+from core.settings import settings
+from core.utils import etag_matches
+
+router = APIRouter()
+
+
+@router.get("/.well-known/jwks.json", responses={
+    304: {"description": "JWK set not modified"},
+})
+async def jwks(request: Request):
+    """
+    Public keys for local token verification by resource servers, selected by the token `kid` header.
+    """
+    headers = {
+        "ETag": keyring.jwks_etag,
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), keyring.jwks_etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=keyring.jwks, headers=headers)
@@ -0,0 +1,33 @@
+# # Native # #
+
+# # Installed # #
+from fastapi import APIRouter, Depends, Request
+
+# # Package # #
+from app.model import User
+from app.user.util import get_current_user
+from core.base.schema import IGetResponseBase
+from core.executor import crypto_executor
+from core.security import token_cache
+from core.ratelimit import login_limiter
+from app.rbac.util import decision_cache
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_model=IGetResponseBase[dict])
+async def read_metrics(
+    request: Request,
+    current_user: User = Depends(get_current_user(required_permissions=True)),
+):
+    """
+    In-process counters of the worker: crypto executor queue, token cache, login rate limiter and policy caches.
+    """
+    return IGetResponseBase[dict](data={
+        "crypto_executor": crypto_executor.stats(),
+        "token_cache": token_cache.stats(),
+        "login_rate_limit": login_limiter.stats(),
+        "rbac": request.app.rbac.refresher.stats(),
+        "rbac_decisions": decision_cache.stats(),
+        "visibility_group": request.app.visibility_group.refresher.stats(),
+    })
@@ -0,0 +1,33 @@
+# # Native # #
+
+# # Installed # #
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import APIRouter, Depends, Request, Response
+
+# # Package # #
+from app.policy.bundle import policy_bundles
+from core.database.session import get_session
+from core.utils import etag_matches
+
+router = APIRouter()
+
+
+@router.get("/policy/bundle", responses={
+    304: {"description": "Policy bundle not modified"},
+})
+async def get_policy_bundle(
+    request: Request,
+    db_session: AsyncSession = Depends(get_session),
+):
+    """
+    RBAC rules and visibility groups with their version and signature, see app.policy.bundle.
+    Poll with If-None-Match, the bundle is sent again only when the policy changed.
+    """
+    bundle = await policy_bundles.get(db_session)
+    headers = {
+        "ETag": bundle.etag,
+        "Cache-Control": "no-cache",
+    }
+    if etag_matches(request.headers.get("if-none-match"), bundle.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=bundle.body, media_type="application/json", headers=headers)
@@ -1,3 +1,6 @@
+# # Native # #
+from typing import List
+
 # # Installed # #
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import APIRouter, Depends, Request
@@ -7,7 +10,8 @@ from fastapi.security import OAuth2PasswordBearer
 from core.settings import settings
 from core.database.session import get_session
 from app.rbac.schema import IRBACRead
-from app.rbac.schema import IRBACValidateResponse, IRBACValidate
+from app.user.util import Principal, get_principal
+from app.rbac.schema import IRBACValidateResponse, IRBACValidate, IRBACValidateBatch
 from core.base.schema import IGetResponseBase
 
 router = APIRouter()
@@ -30,8 +34,22 @@ async def get_rbac_rules(
 async def validate(
     request: Request,
     req: IRBACValidate,
-    access_token: str = Depends(reusable_oauth2),
+    principal: Principal = Depends(get_principal),
     db_session: AsyncSession = Depends(get_session),
 ):
-    data = await request.app.rbac.validate(db_session=db_session, req=req, access_token=access_token)
+    data = await request.app.rbac.validate(db_session=db_session, req=req, payload=principal.payload)
     return IGetResponseBase[IRBACValidateResponse](data=data)
+
+
+@router.post("/rbac/validate/batch", response_model=IGetResponseBase[List[IRBACValidateResponse]])
+async def validate_batch(
+    request: Request,
+    req: IRBACValidateBatch,
+    principal: Principal = Depends(get_principal),
+    db_session: AsyncSession = Depends(get_session),
+):
+    """
+    Validate up to RBAC_VALIDATE_BATCH_LIMIT (method, endpoint) pairs at once, results in request order.
+    """
+    data = await request.app.rbac.validate_batch(db_session=db_session, reqs=req.items, payload=principal.payload)
+    return IGetResponseBase[List[IRBACValidateResponse]](data=data)
@@ -8,14 +8,13 @@ from fastapi import APIRouter, Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 
 # # Package # #
-from core.security import verify_jwt_token
 from core.settings import Params, Page, settings
 from core.exceptions import NotFoundException, AlreadyExistsException, BadRequestException
 from app.model import User
 from core.base.schema import IDeleteResponseBase, IGetResponseBase, IPostResponseBase, IPutResponseBase
 from app.visibility_group.schema import ICreate, IRead, IUpdate, IFilter, IVisibilityGroupValidateResponse
 from app import crud
-from app.user.util import get_current_user
+from app.user.util import get_current_user, get_principal, Principal
 from core.database.session import get_session
 from core.logger import logger
 from core.constants import VISIBILITY_GROUP_ENTITY_POSSIBLE_VALUES
@@ -72,7 +71,7 @@ async def get_visibility_group_settings(
 async def validate(
     request: Request,
     visibility_group_entity: str,
-    access_token: str = Depends(reusable_oauth2),
+    principal: Principal = Depends(get_principal),
     db_session: AsyncSession = Depends(get_session),
 ):
 
@@ -84,12 +83,10 @@ async def validate(
     data = await request.app.visibility_group.validate(
         db_session=db_session,
         visibility_group_entity=visibility_group_entity,
-        access_token=access_token
+        payload=principal.payload
     )
 
-    meta = await verify_jwt_token(token=access_token, token_type="access", db_session=db_session, crud=crud)
-
-    return IGetResponseBase[IVisibilityGroupValidateResponse](meta=meta, data=data)
+    return IGetResponseBase[IVisibilityGroupValidateResponse](meta=principal.payload, data=data)
 
 
 @router.get("/visibility_group/{visibility_group_id}", response_model=IGetResponseBase[IRead])
@@ -12,6 +12,7 @@ from app.rbac.schema import IRBACValidate
 from app.rbac.util import RBAC
 from core.aws import get_lambda_client
 from core.logger import logger
+from core.settings import settings
 from core.exceptions import ForbiddenException, UnauthorizedException
 
 __all__ = (
@@ -20,6 +21,11 @@ __all__ = (
     "visibility_group_validate",
 )
 
+# kept across warm invocations, so only a cold start loads the rules
+rbac = RBAC()
+if settings.POLICY_BUNDLE_PATH:
+    rbac.preload(settings.POLICY_BUNDLE_PATH)
+
 
 def user_validate(access_token, email, communication):
     """Validate user permissions for the current user."""
@@ -124,7 +130,6 @@ async def rbac_validate(
         if not db_session:
             raise Exception("No db_session provided")
 
-        rbac = RBAC()
         response = await rbac.validate(
             db_session=db_session, req=IRBACValidate(**data), access_token=access_token
         )
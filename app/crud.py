@@ -1,4 +1,5 @@
 from .permission.crud import * # noqa
+from .policy.crud import * # noqa
 from .resource.crud import * # noqa
 from .role.crud import * # noqa
 from .sessions.crud import * # noqa
@@ -1,5 +1,6 @@
 # # Native # #
 import os
+import signal
 import asyncio
 # import uvloop
 # uvloop.install()
@@ -13,9 +14,12 @@ from fastapi import FastAPI
 from app.rbac.util import RBAC
 from app.visibility_group.util import VisibilityGroup
 from app.admin import init_admin
+from app import crud
 from core.database.database import init_database # noqa
+from core.database.session import get_session
 from api.v1.api import router
 from core.settings import settings
+from core.security import configure_password_hashing, reload_keyring, reload_keyring_periodically
 from core.logger import logger
 from core.sentry import sentry_init
 from core.middleware import UserMiddleware
@@ -48,8 +52,24 @@ handler = None
 async def on_startup():
     await asyncio.gather(
         init_database(),
-        init_admin(app)
+        init_admin(app),
+        configure_password_hashing()
         )
+    async for db_session in get_session():
+        await crud.sessions.load_revocations(db_session)
+    if settings.JWK_RELOAD_SECONDS:
+        app.keyring_reloader = asyncio.create_task(reload_keyring_periodically(settings.JWK_RELOAD_SECONDS))
+
+
+async def reload_keyring_on_sighup():
+    """`kill -HUP <pid>` reloads the token signing keys of the worker"""
+    loop = asyncio.get_running_loop()
+
+    def reload():
+        # kept on the app, the loop only holds weak references to its tasks
+        app.keyring_reload = loop.create_task(reload_keyring())
+
+    loop.add_signal_handler(signal.SIGHUP, reload)
 
 
 def wrapper(event, context):
@@ -67,4 +87,5 @@ if os.getenv("AWS_LAMBDA_RUNTIME_API"):
     # logger.add(handler, enqueue=False)
 else:
     app.on_event("startup")(on_startup)
+    app.on_event("startup")(reload_keyring_on_sighup)
     ...
@@ -1,7 +1,8 @@
 from .permission.model import Permission # noqa
+from .policy.model import PolicyVersion # noqa
 from .resource.model import Resource # noqa
 from .role.model import Role # noqa
-from .sessions.model import Sessions # noqa
+from .sessions.model import Sessions, SessionRevocation # noqa
 from .team.model import Team # noqa
-from .user.model import User # noqa
+from .user.model import User, LoginRateLimit # noqa
 from .visibility_group.model import Visibility_Group # noqa
@@ -0,0 +1,135 @@
+"""
+Signed, versioned export of the RBAC rules and visibility groups, so authorisers and downstream services can
+apply the policy locally and download it again only when it changed.
+
+    python -m app.policy.bundle <path>
+"""
+# # Native # #
+import os
+import sys
+import json
+import time
+import base64
+import asyncio
+import hashlib
+from typing import Optional
+
+# # Installed # #
+from fastapi.encoders import jsonable_encoder
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# # Package # #
+from app import crud
+from core.database.session import get_session
+from core.executor import crypto_executor
+from core.keyring import KeyRing
+from core.refresh import RefreshCoordinator
+from core.security import keyring
+from core.settings import settings
+
+__all__ = (
+    "PolicyBundle",
+    "PolicyBundles",
+    "policy_bundles",
+    "verify_bundle",
+    "read_bundle",
+)
+
+
+def bundle_digest(body: dict) -> str:
+    """SHA-256 of the canonical JSON of the bundle without its signature, base64url"""
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(hashlib.sha256(canonical).digest()).rstrip(b"=").decode()
+
+
+class PolicyBundle:
+    """
+    {"version", "issued_at", "rbac_version", "rbac", "visibility_group", "signature"}: `rbac` in the /rbac shape,
+    `visibility_group` in the /visibility_group/settings shape. `signature` is a JWS, verifiable with the
+    /.well-known/jwks.json keys, over {"ver": version, "iat": issued_at, "sha256": digest of the other members}.
+    """
+
+    def __init__(self, content: dict):
+        self.content = content
+        self.version: int = content["version"]
+        self.body = json.dumps(content, separators=(",", ":")).encode()
+        self.etag = f'"{self.version}-{hashlib.sha256(self.body).hexdigest()[:16]}"'
+
+    @classmethod
+    async def build(cls, db_session: AsyncSession, version: int) -> "PolicyBundle":
+        """
+        `version` is read before the policies, so the content is at least as recent as the version it carries
+        and consumers polling by version never miss a change
+        """
+        rbac_version, rbac = await crud.policy.get_rbac_snapshot(db_session)
+        # the groups alone, the lookup structures of a visibility snapshot are not needed to export them
+        _, groups = await crud.policy.get_visibility_snapshot(db_session)
+        visibility_group = {i["prefix"]: i for i in groups}
+        content = jsonable_encoder({
+            "version": version,
+            "issued_at": int(time.time()),
+            # policy version of the rules themselves, what RBAC compares to decide whether to reload them
+            "rbac_version": rbac_version,
+            "rbac": rbac,
+            "visibility_group": visibility_group,
+        })
+        claims = {"ver": version, "iat": content["issued_at"], "sha256": bundle_digest(content)}
+        content["signature"] = await crypto_executor.run(keyring.sign, claims)
+        return cls(content)
+
+    def write(self, path: str) -> None:
+        """written next to `path` and renamed over it, readers never see a partial file"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.body)
+        os.replace(tmp, path)
+
+
+def verify_bundle(content: dict, keys: KeyRing) -> dict:
+    """bundle content when its signature is valid for `keys` and matches the content, raises otherwise"""
+    body = {k: v for k, v in content.items() if k != "signature"}
+    claims = keys.verify(content["signature"])
+    if claims.get("ver") != body.get("version") or claims.get("sha256") != bundle_digest(body):
+        raise ValueError("Policy bundle does not match its signature")
+    return content
+
+
+def read_bundle(path: str, keys: KeyRing) -> dict:
+    with open(path, "rb") as f:
+        return verify_bundle(json.loads(f.read()), keys)
+
+
+class PolicyBundles:
+    """
+    Current bundle of the worker: the bundle version is checked at most every BUNDLE_UPDATE_DELAY seconds
+    and the bundle is rebuilt and signed again only when it changed.
+    """
+
+    def __init__(self):
+        self.BUNDLE_UPDATE_DELAY = 1  # seconds between bundle version checks
+        self.refresher: RefreshCoordinator[PolicyBundle] = RefreshCoordinator(
+            "policy_bundle", max_age=self.BUNDLE_UPDATE_DELAY, max_stale=settings.POLICY_MAX_STALE_SECONDS)
+
+    async def get(self, db_session: AsyncSession) -> PolicyBundle:
+        return await self.refresher.get(lambda: self.refresh(db_session))
+
+    async def refresh(self, db_session: AsyncSession) -> PolicyBundle:
+        bundle: Optional[PolicyBundle] = self.refresher.value
+        version = await crud.policy.get_bundle_version(db_session)
+        if bundle and bundle.version == version:
+            return bundle
+        return await PolicyBundle.build(db_session, version)
+
+
+policy_bundles = PolicyBundles()
+
+
+async def export(path: str) -> None:
+    async for db_session in get_session():
+        bundle = await policy_bundles.get(db_session)
+    bundle.write(path)
+    print(f"policy bundle version {bundle.version} written to {path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(export(sys.argv[1]))
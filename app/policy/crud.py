@@ -0,0 +1,94 @@
+# # Native # #
+import json
+from typing import List, Optional, Tuple
+
+# # Installed # #
+from sqlalchemy import func, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+
+# # Package # #
+from app.policy.model import PolicyVersion, RBAC_POLICY, VISIBILITY_POLICY
+from app.policy.schema import ICreate, IUpdate
+from core.base.crud import CRUDBase
+
+__all__ = ("policy",)
+
+
+class CRUD(CRUDBase[PolicyVersion, ICreate, IUpdate]):
+    # the /rbac rules and their version read in one statement, so they are consistent with each other
+    RBAC_SNAPSHOT = text("""
+        SELECT json_build_object(
+            'version', (SELECT version FROM auth.policy_version WHERE name = :name),
+            'roles', (SELECT coalesce(json_object_agg(id, title ORDER BY id), '{}') FROM auth.role),
+            'resources', (
+                SELECT coalesce(json_object_agg(id, json_build_object(
+                    'endpoint', endpoint,
+                    'method', method,
+                    'rbac_enable', rbac_enable,
+                    'visibility_group_enable', visibility_group_enable
+                ) ORDER BY id), '{}')
+                FROM auth.resource
+            ),
+            'permissions', (
+                SELECT coalesce(json_object_agg(id, json_build_object(
+                    'role_id', role_id,
+                    'resource_id', resource_id
+                ) ORDER BY id), '{}')
+                FROM auth.permission
+            )
+        )::text
+    """)
+
+    # visibility groups projected to the columns of the settings, with their members' id and email
+    VISIBILITY_SNAPSHOT = text("""
+        SELECT json_build_object(
+            'version', (SELECT version FROM auth.policy_version WHERE name = :name),
+            'groups', (
+                SELECT coalesce(json_agg(json_build_object(
+                    'id', g.id,
+                    'prefix', g.prefix,
+                    'admin', g.admin,
+                    'opportunity', coalesce(g.opportunity, '{}'),
+                    'seller', coalesce(g.seller, '{}'),
+                    'activity', coalesce(g.activity, '{}'),
+                    'property', coalesce(g.property, '{}'),
+                    'user', coalesce(m.users, '[]')
+                ) ORDER BY g.prefix), '[]')
+                FROM auth.visibility_group g
+                LEFT JOIN (
+                    SELECT visibility_group_id, json_agg(json_build_object('id', id, 'email', email) ORDER BY id) AS users
+                    FROM auth."user"
+                    WHERE visibility_group_id IS NOT NULL
+                    GROUP BY visibility_group_id
+                ) m ON m.visibility_group_id = g.id
+            )
+        )::text
+    """)
+
+    async def get_version(self, db_session: AsyncSession, *, name: str) -> Optional[int]:
+        response = await db_session.exec(select(PolicyVersion.version).where(PolicyVersion.name == name))
+        return response.first()
+
+    async def get_bundle_version(self, db_session: AsyncSession) -> int:
+        """version of the policy bundle, the sum of its policies' counters, so it only ever grows"""
+        response = await db_session.exec(
+            select(func.coalesce(func.sum(PolicyVersion.version), 0))
+            .where(PolicyVersion.name.in_((RBAC_POLICY, VISIBILITY_POLICY)))
+        )
+        return int(response.one())
+
+    async def get_rbac_snapshot(self, db_session: AsyncSession) -> Tuple[Optional[int], dict]:
+        """version and rules of the RBAC policy in the /rbac shape"""
+        response = await db_session.execute(self.RBAC_SNAPSHOT, {"name": RBAC_POLICY})
+        data = json.loads(response.scalar_one())
+        return data.pop("version"), data
+
+    async def get_visibility_snapshot(self, db_session: AsyncSession) -> Tuple[Optional[int], List[dict]]:
+        """version and groups of the visibility policy in the /visibility_group/settings shape, ids as strings"""
+        response = await db_session.execute(self.VISIBILITY_SNAPSHOT, {"name": VISIBILITY_POLICY})
+        data = json.loads(response.scalar_one())
+        return data["version"], data["groups"]
+
+
+policy = CRUD(PolicyVersion)
@@ -0,0 +1,27 @@
+# # Native # #
+from datetime import datetime
+
+# # Installed # #
+from sqlmodel import SQLModel, Field
+from sqlalchemy import TIMESTAMP, Column, func
+
+__all__ = (
+    "PolicyVersion",
+    "RBAC_POLICY",
+    "VISIBILITY_POLICY",
+)
+
+RBAC_POLICY = "rbac"
+VISIBILITY_POLICY = "visibility"
+
+
+class PolicyVersion(SQLModel, table=True):
+    """
+    Change counter of a policy, bumped by triggers on the tables the policy is built from.
+    Workers rebuild their in-process snapshot of the policy only when the counter moves.
+    """
+    __tablename__ = "policy_version"
+    __table_args__ = {"comment": "Policy Version", "schema": "auth"}
+    name: str = Field(primary_key=True, nullable=False)
+    version: int = Field(default=0, nullable=False)
+    updated_at: datetime = Field(sa_column=Column(TIMESTAMP, server_default=func.now()))
@@ -0,0 +1,19 @@
+# # Native # #
+
+# # Installed # #
+from pydantic import BaseModel
+
+# # Package # #
+
+__all__ = (
+    "ICreate",
+    "IUpdate",
+)
+
+
+class ICreate(BaseModel):
+    name: str
+
+
+class IUpdate(BaseModel):
+    version: int
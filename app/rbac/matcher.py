@@ -0,0 +1,108 @@
+# # Native # #
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# # Installed # #
+
+# # Package # #
+from core.logger import logger
+
+__all__ = (
+    "RouteMatcher",
+)
+
+# a placeholder matches one path segment, as the `[\w.-]+` regex it used to be replaced with
+PLACEHOLDERS = {"$str$": r"[\w.-]+", "$uuid$": r"[\w.-]+"}
+SEGMENT = re.compile(r"[\w.-]+")
+# regex syntax in an endpoint, other than a whole-segment placeholder, sends it to the regex fallback
+REGEX_CHARS = re.compile(r"[\\^$.|?*+()\[\]{}]")
+
+
+class Node:
+    __slots__ = ("children", "uuid", "str", "resource_id")
+
+    def __init__(self):
+        self.children: Dict[str, "Node"] = {}
+        self.uuid: Optional["Node"] = None
+        self.str: Optional["Node"] = None
+        self.resource_id: Optional[str] = None
+
+
+class RouteMatcher:
+    """
+    Resource lookup by method and request path, built once per RBAC snapshot.
+
+    Endpoints are split into `/` segments and stored in a trie per method. A literal segment wins over
+    `$uuid$`, which wins over `$str$`, segment by segment from the left, so the most specific endpoint matches
+    regardless of resource order; duplicates keep the first resource. Endpoints using any other regex syntax
+    are compiled once and tried in resource order when the trie has no match.
+    """
+
+    def __init__(self):
+        self.tries: Dict[str, Node] = {}
+        self.fallback: Dict[str, List[Tuple[Pattern, str]]] = {}
+
+    @classmethod
+    def from_resources(cls, resources: Dict[str, dict]) -> "RouteMatcher":
+        """`resources` in the /rbac shape: resource_id: {"endpoint", "method", ...}"""
+        matcher = cls()
+        for resource_id, resource in resources.items():
+            matcher.add(resource["method"], resource["endpoint"], resource_id)
+        return matcher
+
+    def add(self, method: str, endpoint: str, resource_id: str) -> None:
+        segments = endpoint.split("/")
+        if any(i not in PLACEHOLDERS and REGEX_CHARS.search(i) for i in segments):
+            self.add_pattern(method, endpoint, resource_id)
+            return
+        node = self.tries.setdefault(method, Node())
+        for segment in segments:
+            if segment in PLACEHOLDERS:
+                attr = segment.strip("$")
+                child = getattr(node, attr)
+                if child is None:
+                    child = Node()
+                    setattr(node, attr, child)
+                node = child
+            else:
+                node = node.children.setdefault(segment, Node())
+        if node.resource_id is None:
+            node.resource_id = resource_id
+
+    def add_pattern(self, method: str, endpoint: str, resource_id: str) -> None:
+        pattern = endpoint
+        for placeholder, regexp in PLACEHOLDERS.items():
+            pattern = pattern.replace(placeholder, regexp)
+        try:
+            self.fallback.setdefault(method, []).append((re.compile(pattern), resource_id))
+        except re.error as e:
+            logger.error(f"Invalid resource endpoint {endpoint}: {e}")
+
+    def match(self, method: str, path: str) -> Optional[str]:
+        """id of the resource matching the request, None when there is none"""
+        root = self.tries.get(method)
+        if root:
+            resource_id = self._match(root, path.split("/"), 0)
+            if resource_id:
+                return resource_id
+        for pattern, resource_id in self.fallback.get(method, ()):
+            if pattern.fullmatch(path):
+                return resource_id
+        return None
+
+    def _match(self, node: Node, segments: List[str], index: int) -> Optional[str]:
+        if index == len(segments):
+            return node.resource_id
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child:
+            resource_id = self._match(child, segments, index + 1)
+            if resource_id:
+                return resource_id
+        if (node.uuid or node.str) and SEGMENT.fullmatch(segment):
+            for child in (node.uuid, node.str):
+                if child:
+                    resource_id = self._match(child, segments, index + 1)
+                    if resource_id:
+                        return resource_id
+        return None
@@ -1,16 +1,18 @@
 # # Native # #
-from typing import Optional
+from typing import List, Optional
 from urllib.parse import urlparse
 
 # # Installed # #
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, Field, validator
 
 # # Installed # #
 from core.logger import logger
+from core.constants import RBAC_VALIDATE_BATCH_LIMIT
 
 __all__ = (
     "IRBACRead",
     "IRBACValidate",
+    "IRBACValidateBatch",
     "IRBACValidateResponse",
 )
 
@@ -48,6 +50,10 @@ class IRBACValidate(BaseModel):
         return v
 
 
+class IRBACValidateBatch(BaseModel):
+    items: List[IRBACValidate] = Field(..., min_items=1, max_items=RBAC_VALIDATE_BATCH_LIMIT)
+
+
 class IRBACValidateResponse(BaseModel):
     access: bool = True
     rbac_enable: bool = False
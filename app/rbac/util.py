@@ -1,73 +1,152 @@
 # # Native # #
-import re
-from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 # # Installed # #
+import jwt
 import httpx
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 # # Package # #
 from app import crud
-from core.security import verify_jwt_token
+from core.security import keyring, verify_jwt_token
 from core.settings import settings
 from core.logger import logger
+from core.cache import TTLCache
+from core.refresh import RefreshCoordinator
 from app.rbac.schema import IRBACValidate, IRBACValidateResponse
+from app.rbac.matcher import RouteMatcher
+from app.policy.model import RBAC_POLICY
+from app.policy.bundle import read_bundle
 
 __all__ = (
     "RBAC",
+    "RBACSnapshot",
+    "DecisionCache",
+    "decision_cache",
 )
 
 
+class RBACSnapshot:
+    """
+    RBAC rules in the /rbac shape with the lookup structures built from them once per load,
+    never modified once built
+    """
+
+    def __init__(self, data: dict, version: Optional[int] = None):
+        self.data = data
+        self.version = version
+        self.matcher = RouteMatcher.from_resources(data["resources"])
+        # resource_id: permissions in load order, resource_id: ids of the roles allowed
+        self.resource_permissions: Dict[str, List[dict]] = {}
+        for permission in data["permissions"].values():
+            self.resource_permissions.setdefault(str(permission["resource_id"]), []).append(permission)
+        self.resource_roles: Dict[str, FrozenSet[str]] = {
+            k: frozenset(str(i["role_id"]) for i in v) for k, v in self.resource_permissions.items()
+        }
+
+    def match(self, method: str, endpoint: str) -> Optional[str]:
+        return self.matcher.match(method, endpoint)
+
+    def allowed_roles(self, resource_id: str, roles: Iterable[str]) -> FrozenSet[str]:
+        """`roles` allowed to access the resource"""
+        return self.resource_roles.get(resource_id, frozenset()).intersection(roles)
+
+    def permissions(self, resource_id: str, roles: Iterable[str]) -> List[dict]:
+        """permissions of the resource granted to `roles`"""
+        roles = set(roles)
+        return [i for i in self.resource_permissions.get(resource_id, ()) if str(i["role_id"]) in roles]
+
+
+class DecisionCache:
+    """
+    Access decisions per (policy version, role set, method, resource). Entries of a replaced version are no longer
+    read and age out of the LRU, so workers or warm invocations alternating between snapshots of two versions
+    keep the decisions of both. Snapshots without a version are not cached.
+    """
+
+    def __init__(self, maxsize: int):
+        # decisions never go stale within their version, the ttl merely bounds idle entries
+        self.cache = TTLCache(maxsize=maxsize, ttl=3600)
+
+    def get(self, snapshot: RBACSnapshot, key: Tuple) -> Optional[dict]:
+        if snapshot.version is None or not self.cache.maxsize:
+            return None
+        return self.cache.get((snapshot.version, *key))
+
+    def set(self, snapshot: RBACSnapshot, key: Tuple, decision: dict) -> None:
+        if snapshot.version is not None and self.cache.maxsize:
+            self.cache.set((snapshot.version, *key), decision)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+decision_cache = DecisionCache(maxsize=settings.RBAC_DECISION_CACHE_SIZE)
+
+
 class RBAC:
     def __init__(self):
-        self.rbac = {}
-        self.rbac_update_timestamp = 0
-        self.RBAC_UPDATE_DELAY = 1  # TODO: increase this to value
-        self.patterns = {"$str$": r"[\w.-]+", "$uuid$": r"[\w.-]+"}
+        self.RBAC_UPDATE_DELAY = 1  # seconds between policy version checks
+        self.refresher: RefreshCoordinator[RBACSnapshot] = RefreshCoordinator(
+            "rbac", max_age=self.RBAC_UPDATE_DELAY, max_stale=settings.POLICY_MAX_STALE_SECONDS)
+
+    @property
+    def snapshot(self) -> Optional[RBACSnapshot]:
+        return self.refresher.value
+
+    @property
+    def rbac(self) -> dict:
+        return self.snapshot.data if self.snapshot else {}
+
+    def preload(self, path: str) -> None:
+        """
+        start from a policy bundle file (app.policy.bundle) instead of a database load,
+        its version is then checked against the database as usual
+        """
+        try:
+            content = read_bundle(path, keyring)
+            self.refresher.set(RBACSnapshot(content["rbac"], content.get("rbac_version")))
+        except (OSError, KeyError, ValueError, jwt.InvalidTokenError) as e:
+            logger.error(f"Policy bundle {path} not loaded: {e}")
 
     async def get(
         self,
         db_session: AsyncSession,
     ):
-        if not self.rbac:
-            await self.update(db_session)
-            self.rbac_update_timestamp = int(datetime.now().timestamp())
-        if (int(datetime.now().timestamp()) - self.rbac_update_timestamp) > self.RBAC_UPDATE_DELAY:
-            await self.update(db_session)
-            self.rbac_update_timestamp = int(datetime.now().timestamp())
-        return self.rbac
+        return (await self.get_snapshot(db_session)).data
+
+    async def get_snapshot(
+        self,
+        db_session: AsyncSession,
+    ) -> RBACSnapshot:
+        """
+        current rules, the `rbac` policy version is checked at most every RBAC_UPDATE_DELAY seconds
+        by one request at a time, the others keep using the current snapshot meanwhile
+        """
+        return await self.refresher.get(lambda: self.refresh(db_session))
+
+    async def refresh(
+        self,
+        db_session: AsyncSession,
+    ) -> RBACSnapshot:
+        """rules are rebuilt only when the `rbac` policy version has changed"""
+        snapshot = self.snapshot
+        if snapshot:
+            version = await crud.policy.get_version(db_session, name=RBAC_POLICY)
+            # without a version row (migration not applied) the rules are rebuilt on every check
+            if version is not None and version == snapshot.version:
+                return snapshot
+        return await self.update(db_session)
 
     async def update(
         self,
         db_session: AsyncSession,
-    ):
+    ) -> RBACSnapshot:
         '''
-        read database, make rules, save rules to self.rbac
+        read database, make rules
         '''
-        data = {"roles": {}, "resources": {}, "permissions": {}}
-        roles = await crud.role.get_all(db_session)
-        resources = await crud.resource.get_all(db_session)
-        permissions = await crud.permission.get_all(db_session)
-        for i in roles:
-            data['roles'][str(i.id)] = i.title
-        for i in resources:
-            data['resources'][str(i.id)] = {
-                "endpoint": i.endpoint,
-                "method": i.method,
-                "rbac_enable": i.rbac_enable,
-                "visibility_group_enable": i.visibility_group_enable
-            }
-        for i in permissions:
-            data['permissions'][str(i.id)] = {
-                "role_id": i.role_id,
-                "resource_id": i.resource_id
-            }
-        for _ in [data['resources'], data['permissions']]:
-            for k, v in _.items():
-                if not isinstance(k, str) or not isinstance(v, dict):
-                    ...
-                    # TODO raise error
-        self.rbac = data
+        version, data = await crud.policy.get_rbac_snapshot(db_session)
+        return RBACSnapshot(data, version)
 
     async def get_from_api(self):
         async with httpx.ClientSession() as session:
@@ -80,42 +159,64 @@ class RBAC:
         self,
         db_session: AsyncSession,
         req: IRBACValidate,
-        access_token: str,
+        access_token: Optional[str] = None,
+        payload: Optional[dict] = None,
     ) -> IRBACValidateResponse:
+        """`payload`: claims of the already verified access token, else `access_token` is verified"""
         logger.debug(f"validate request: {req}")
-        payload = await verify_jwt_token(token=access_token, token_type="access", db_session=db_session, crud=crud)
-        self.rbac = await self.get(db_session)
-        response = {
-            "access": True,
-            "rbac_enable": False,
-            "visibility_group_enable": False,
-            "permissions": [],
-            "detail": ""
-        }
-        # find resource_id
-        for resource_id, resource in self.rbac['resources'].items():
-            if not resource['method'] == req.method:
-                continue
-
-            # replace $str$ and $uuid$ with regex.
-            endpoint = resource['endpoint']
-            for pattern, regexp in self.patterns.items():
-                endpoint = endpoint.replace(pattern, regexp)
-
-            logger.debug(f"matching {endpoint} with {req.endpoint}")
-            if re.fullmatch(endpoint, req.endpoint):
-                logger.debug(f"matched resource: {req.endpoint} {endpoint}")
-                response["resource_id"] = resource_id
-                response['rbac_enable'] = resource['rbac_enable']
-                response['visibility_group_enable'] = resource['visibility_group_enable']
-                break
-
-        if "resource_id" not in response:
-            response["detail"] = "resource not found"
+        if payload is None:
+            payload = await verify_jwt_token(token=access_token, token_type="access", db_session=db_session, crud=crud)
+        snapshot = await self.get_snapshot(db_session)
+        return self.decide(snapshot, req, payload['roles'])
+
+    async def validate_batch(
+        self,
+        db_session: AsyncSession,
+        reqs: List[IRBACValidate],
+        access_token: Optional[str] = None,
+        payload: Optional[dict] = None,
+    ) -> List[dict]:
+        """decisions in request order, the token is verified once and every item sees the same snapshot"""
+        if payload is None:
+            payload = await verify_jwt_token(token=access_token, token_type="access", db_session=db_session, crud=crud)
+        snapshot = await self.get_snapshot(db_session)
+        return [self.decide(snapshot, req, payload['roles']) for req in reqs]
+
+    def decide(self, snapshot: RBACSnapshot, req: IRBACValidate, roles: Iterable[str]) -> dict:
+        """access decision for a request, memoized per (roles, method, resource) for the snapshot version"""
+        resource_id = snapshot.match(req.method, req.endpoint)
+        if not resource_id:
+            response = {
+                "access": True,
+                "rbac_enable": False,
+                "visibility_group_enable": False,
+                "permissions": [],
+                "detail": "resource not found"
+            }
             logger.debug(
                 f"resource not found, hence access allowed; response: {response}")
             return response
 
+        key = (frozenset(roles), req.method, resource_id)
+        response = decision_cache.get(snapshot, key)
+        if response is None:
+            response = self.evaluate(snapshot, resource_id, key[0])
+            decision_cache.set(snapshot, key, response)
+        # cached decisions and the permissions of the snapshot are shared, callers get their own copy
+        return {**response, "permissions": [dict(i) for i in response["permissions"]]}
+
+    def evaluate(self, snapshot: RBACSnapshot, resource_id: str, roles: FrozenSet[str]) -> dict:
+        resource = snapshot.data['resources'][resource_id]
+        logger.debug(f"matched resource: {resource['endpoint']}")
+        response = {
+            "access": True,
+            "rbac_enable": resource['rbac_enable'],
+            "visibility_group_enable": resource['visibility_group_enable'],
+            "permissions": (),
+            "detail": "",
+            "resource_id": resource_id,
+        }
+
         if not response['rbac_enable']:
             response["detail"] = "rbac is disabled"
             logger.debug(
@@ -123,9 +224,9 @@ class RBAC:
             return response
 
         # find permissions by user role_id and resource_id
-        for _, v in self.rbac['permissions'].items():
-            if str(v['role_id']) in payload['roles'] and str(v['resource_id']) == response['resource_id']:
-                response['permissions'].append(v)
+        allowed_roles = snapshot.allowed_roles(resource_id, roles)
+        if allowed_roles:
+            response['permissions'] = tuple(snapshot.permissions(resource_id, allowed_roles))
 
         if not response['permissions']:
             response['access'] = False
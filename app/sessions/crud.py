@@ -1,16 +1,25 @@
 # # Native # #
+import time
+from typing import List, Optional, Union
+from uuid import UUID
 
 # # Installed # #
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
+from sqlmodel import select, delete
 
 # # Package # #
 from app.sessions.schema import ICreate, IUpdate
+from app.sessions.util import RevocationIndex
 from core.base.crud import CRUDBase
-from app.sessions.model import Sessions
+from core.security import invalidate_token, get_unverified_claims, token_digest
+from app.sessions.model import Sessions, SessionRevocation
 
 
 class CRUD(CRUDBase[Sessions, ICreate, IUpdate]):
+    def __init__(self, model):
+        super().__init__(model)
+        self.revocations = RevocationIndex()
+
     async def create(self, db_session: AsyncSession, *, obj_in: ICreate) -> Sessions:
         db_obj = obj_in
         db_session.add(db_obj)
@@ -18,13 +27,112 @@ class CRUD(CRUDBase[Sessions, ICreate, IUpdate]):
         await db_session.refresh(db_obj)
         return db_obj
 
-    async def get_by_access_token(self, db_session: AsyncSession, *, access_token: str) -> Sessions:
-        sessions = await db_session.exec(select(Sessions).where(Sessions.access_token == access_token))
-        return sessions.first()
+    async def refresh_access_token(
+        self, db_session: AsyncSession, *, session: Sessions, access_token: str, expires_at: int, cookie: str
+    ) -> Sessions:
+        """
+        bind a newly issued access token to the session,
+        access tokens issued for the session before it are revoked,
+        including the ones issued in the same second
+        """
+        claims = get_unverified_claims(access_token)
+        await self.revoke(
+            db_session,
+            session_id=session.id,
+            revoked_before=claims["iat"] + 1,
+            expires_at=session.expires_at,
+            current_jti=claims["jti"],
+        )
+        invalidate_token(session.access_token_digest)
+        return await self.update(db_session, obj_current=session, obj_new={
+            "access_token_digest": token_digest(access_token),
+            "expires_at": expires_at,
+            "cookie": cookie,
+        })
+
+    async def remove(self, db_session: AsyncSession, *, id: Union[UUID, str]) -> Sessions:
+        response = await db_session.exec(select(Sessions).where(Sessions.id == id))
+        session = response.one()
+        await db_session.delete(session)
+        await db_session.commit()
+        # the row of `auth.session_revocation` is inserted by the delete trigger, the index of this worker
+        # is updated right away, other workers pick it up on their next sync
+        self.revocations.add(session.id, int(time.time()) + 1, session.expires_at)
+        invalidate_token(session.access_token_digest)
+        invalidate_token(session.refresh_token_digest)
+        return session
+
+    async def remove_by_cookie(
+        self, db_session: AsyncSession, *, cookie_id: str, user_id: Union[UUID, str]
+    ) -> List[Sessions]:
+        """remove sessions of the user opened with the cookie, `cookie_id` is the verified cookie id"""
+        response = await db_session.exec(
+            select(Sessions.id).where(Sessions.cookie == cookie_id, Sessions.user_id == user_id))
+        return [await self.remove(db_session, id=i) for i in response.all()]
+
+    async def revoke(
+        self,
+        db_session: AsyncSession,
+        *,
+        session_id: Union[UUID, str],
+        revoked_before: int,
+        expires_at: int,
+        current_jti: Optional[str] = None,
+    ) -> None:
+        """
+        revoke tokens of the session issued before `revoked_before`, except the `current_jti` token,
+        the caller commits
+        """
+        await db_session.execute(
+            delete(SessionRevocation).where(SessionRevocation.expires_at < int(time.time())))
+        revocation = await db_session.get(SessionRevocation, session_id)
+        if revocation:
+            if revoked_before >= revocation.revoked_before:
+                revocation.revoked_before, revocation.current_jti = revoked_before, current_jti
+            revocation.expires_at = max(revocation.expires_at, expires_at)
+        else:
+            revocation = SessionRevocation(
+                session_id=session_id, revoked_before=revoked_before, expires_at=expires_at, current_jti=current_jti)
+        db_session.add(revocation)
+        self.revocations.add(session_id, revoked_before, expires_at, current_jti)
 
-    async def get_by_refresh_token(self, db_session: AsyncSession, *, refresh_token: str) -> Sessions:
-        sessions = await db_session.exec(select(Sessions).where(Sessions.refresh_token == refresh_token))
+    async def get_revocations(self, db_session: AsyncSession) -> List[SessionRevocation]:
+        response = await db_session.exec(
+            select(SessionRevocation).where(SessionRevocation.expires_at >= int(time.time())))
+        return response.all()
+
+    async def load_revocations(self, db_session: AsyncSession) -> None:
+        self.revocations.replace(await self.get_revocations(db_session))
+
+    async def is_revoked(
+        self, db_session: AsyncSession, *, session_id: Union[UUID, str], issued_at: int, jti: Optional[str] = None
+    ) -> bool:
+        if self.revocations.is_stale():
+            await self.load_revocations(db_session)
+        return self.revocations.is_revoked(session_id, issued_at, jti)
+
+    async def get_by_access_token(self, db_session: AsyncSession, *, access_token: str) -> Optional[Sessions]:
+        sessions = await db_session.exec(
+            select(Sessions).where(Sessions.access_token_digest == token_digest(access_token)))
         return sessions.first()
 
+    async def get_by_access_token_digests(self, db_session: AsyncSession, *, digests: List[str]) -> List[Sessions]:
+        if not digests:
+            return []
+        sessions = await db_session.exec(select(Sessions).where(Sessions.access_token_digest.in_(digests)))
+        return sessions.all()
+
+    async def get_by_refresh_token(
+        self, db_session: AsyncSession, *, refresh_token: str, session_id: Optional[Union[UUID, str]] = None
+    ) -> Optional[Sessions]:
+        digest = token_digest(refresh_token)
+        if not session_id:
+            sessions = await db_session.exec(select(Sessions).where(Sessions.refresh_token_digest == digest))
+            return sessions.first()
+        session = await db_session.get(Sessions, UUID(str(session_id)))
+        if session and session.refresh_token_digest == digest:
+            return session
+        return None
+
 
 sessions = CRUD(Sessions)
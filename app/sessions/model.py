@@ -1,15 +1,17 @@
 # # Native # #
 import uuid
+from typing import Optional
 from uuid import UUID
 from datetime import datetime
 
 # # Installed # #
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import TIMESTAMP, Column, func
+from sqlalchemy import TIMESTAMP, Column, String, func
 
 __all__ = (
     "SessionsBase",
     "Sessions",
+    "SessionRevocation",
 )
 
 
@@ -20,9 +22,11 @@ class SessionsBase(SQLModel):
         index=True,
         nullable=False,
     )
-    cookie: str
-    access_token: str
-    refresh_token: str
+    # id part of the signed `auth` cookie
+    cookie: str = Field(index=True)
+    # SHA-256 hex digests of the issued tokens, the tokens themselves are not stored
+    access_token_digest: str = Field(sa_column=Column(String(64), nullable=False, unique=True, index=True))
+    refresh_token_digest: str = Field(sa_column=Column(String(64), nullable=False, unique=True, index=True))
     token_type: str = "bearer"
     expires_at: int
     created_at: datetime = Field(sa_column=Column(TIMESTAMP, server_default=func.now()))
@@ -39,3 +43,19 @@ class Sessions(SessionsBase, table=True):
     user: "User" = Relationship(
         sa_relationship_kwargs={"uselist": False}, back_populates="sessions"
     )
+
+
+class SessionRevocation(SQLModel, table=True):
+    """
+    Tokens of the session issued before `revoked_before` are no longer valid, except the token with
+    the `current_jti` id, the token that replaced them.
+    The row is kept until `expires_at`, when every affected access token has expired anyway.
+    Deleting a row of `auth.sessions` inserts its revocation through the `revoke_deleted_session` trigger.
+    """
+    __tablename__ = "session_revocation"
+    __table_args__ = {"comment": "Session Revocation", "schema": "auth"}
+    session_id: uuid.UUID = Field(primary_key=True, nullable=False)
+    revoked_before: int
+    current_jti: Optional[str] = Field(default=None, nullable=True)
+    expires_at: int = Field(index=True)
+    created_at: datetime = Field(sa_column=Column(TIMESTAMP, server_default=func.now()))
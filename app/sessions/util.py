@@ -0,0 +1,56 @@
+# # Native # #
+import time
+from typing import Dict, Iterable, Optional, Tuple, Union
+from uuid import UUID
+
+# # Installed # #
+
+# # Package # #
+from core.settings import settings
+
+__all__ = ("RevocationIndex",)
+
+
+class RevocationIndex:
+    """
+    In-process view of `auth.session_revocation`.
+    Local revocations are applied immediately, revocations made by other workers
+    become visible after at most `REVOCATIONS_UPDATE_DELAY` seconds.
+    """
+
+    def __init__(self):
+        # session_id: (revoked_before, expires_at, current_jti)
+        self.revocations: Dict[str, Tuple[int, int, Optional[str]]] = {}
+        self.revocations_update_timestamp = 0
+        self.REVOCATIONS_UPDATE_DELAY = settings.SESSION_REVOCATION_SYNC_SECONDS
+
+    def is_stale(self) -> bool:
+        return (time.time() - self.revocations_update_timestamp) > self.REVOCATIONS_UPDATE_DELAY
+
+    def replace(self, rows: Iterable) -> None:
+        self.revocations = {str(i.session_id): (i.revoked_before, i.expires_at, i.current_jti) for i in rows}
+        self.revocations_update_timestamp = time.time()
+
+    def add(
+        self, session_id: Union[UUID, str], revoked_before: int, expires_at: int, current_jti: Optional[str] = None
+    ) -> None:
+        current = self.revocations.get(str(session_id))
+        if current:
+            if revoked_before < current[0]:
+                revoked_before, current_jti = current[0], current[2]
+            expires_at = max(expires_at, current[1])
+        self.revocations[str(session_id)] = (revoked_before, expires_at, current_jti)
+
+    def is_revoked(self, session_id: Union[UUID, str], issued_at: int, jti: Optional[str] = None) -> bool:
+        """
+        tokens issued before `revoked_before` are revoked, except the current token of the session
+        issued in the same second as the revocation
+        """
+        revocation = self.revocations.get(str(session_id))
+        if not revocation:
+            return False
+        revoked_before, expires_at, current_jti = revocation
+        if expires_at < time.time():
+            del self.revocations[str(session_id)]
+            return False
+        return issued_at < revoked_before and (current_jti is None or jti != current_jti)
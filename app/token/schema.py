@@ -1,10 +1,11 @@
 # # Native # #
-from typing import Optional
+from typing import List, Optional
 
 # # Installed # #
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # # Package # #
+from core.constants import TOKEN_VERIFY_BATCH_LIMIT
 
 
 class Token(BaseModel):
@@ -16,3 +17,13 @@ class Token(BaseModel):
 
 class RefreshToken(BaseModel):
     refresh_token: str
+
+
+class ITokenVerifyBatch(BaseModel):
+    tokens: List[str] = Field(..., min_items=1, max_items=TOKEN_VERIFY_BATCH_LIMIT)
+
+
+class ITokenVerifyResult(BaseModel):
+    valid: bool
+    claims: Optional[dict]
+    detail: str = ""
@@ -7,14 +7,16 @@ from uuid import UUID
 from sqlalchemy.orm import selectinload
 from pydantic.networks import EmailStr
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
+from sqlmodel import select, update
 from sqlalchemy.exc import SQLAlchemyError
+from fastapi import BackgroundTasks
 
 # # Package # #
 from core.base.crud import CRUDBase
 from app.user.schema import ICreate, IUpdate
 from core.exceptions import BadRequestException, ConflictException
-from core.security import verify_password
+from core.security import verify_and_update_password, get_password_hash
+from core.ratelimit import login_limiter
 from app.user.model import User
 from app.role.model import Role
 from app.team.model import Team
@@ -24,6 +26,19 @@ __all__ = ("user",)
 
 
 class CRUD(CRUDBase[User, ICreate, IUpdate]):
+    async def create(
+        self,
+        db_session: AsyncSession,
+        *,
+        obj_in: Union[ICreate, User],
+        created_by: Optional[Union[UUID, str]] = None
+    ) -> User:
+        password = getattr(obj_in, "password", None)
+        if password:
+            # hashed off the event loop instead of in the ICreate validator
+            obj_in = obj_in.copy(update={"hashed_password": await get_password_hash(password)})
+        return await super().create(db_session, obj_in=obj_in, created_by=created_by)
+
     async def get_by_email(
         self, db_session: AsyncSession, *, email: str
     ) -> Optional[User]:
@@ -88,9 +103,27 @@ class CRUD(CRUDBase[User, ICreate, IUpdate]):
             response.append(x)
         return response
 
+    async def update_password_hash(
+        self, db_session: AsyncSession, *, id: Union[UUID, str], hashed_password: str
+    ) -> None:
+        await db_session.execute(update(User).where(User.id == id).values(hashed_password=hashed_password))
+        await db_session.commit()
+
     async def authenticate(
-        self, db_session: AsyncSession, *, email: EmailStr, password: str
+        self,
+        db_session: AsyncSession,
+        *,
+        email: EmailStr,
+        password: str,
+        client_ip: Optional[str] = None,
+        background_tasks: Optional[BackgroundTasks] = None
     ) -> Optional[User]:
+        """
+        attempts are rate limited by email and `client_ip` before any hashing;
+        a stored hash of an outdated scheme or cost is replaced after the response is sent
+        when `background_tasks` is given, otherwise before returning
+        """
+        await login_limiter.check(ip=client_ip, email=email.lower())
         try:
             user = await self.get_by_email(db_session, email=email)
         except SQLAlchemyError as e:
@@ -101,8 +134,15 @@ class CRUD(CRUDBase[User, ICreate, IUpdate]):
             raise ConflictException(detail="User is disabled")
         if not user.allow_basic_login:
             raise ConflictException(detail="Basic login is disabled for this user")
-        if not await verify_password(password, user.hashed_password):
+        valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+        if not valid:
             raise BadRequestException(detail="Incorrect email or password")
+        if new_hash:
+            if background_tasks:
+                background_tasks.add_task(
+                    self.update_password_hash, db_session, id=user.id, hashed_password=new_hash)
+            else:
+                await self.update_password_hash(db_session, id=user.id, hashed_password=new_hash)
         return user
 
 
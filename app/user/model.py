@@ -14,7 +14,10 @@ from app.common.links import LinkRoleUser, LinkTeamUser
 from core.base.model import BaseUUIDModel
 
 
-__all__ = ("User",)
+__all__ = (
+    "User",
+    "LoginRateLimit",
+)
 
 
 class UserBase(SQLModel):
@@ -85,6 +88,18 @@ class User(BaseUUIDModel, UserBase, table=True):
     )
 
 
+class LoginRateLimit(SQLModel, table=True):
+    """
+    Login attempt token bucket of a key (`email:<email>`, `ip:<address>`), see core.ratelimit.
+    Rows untouched for a rate limit window are deleted, their buckets are full.
+    """
+    __tablename__ = "login_rate_limit"
+    __table_args__ = {"comment": "Login Rate Limit", "schema": "auth"}
+    key: str = Field(primary_key=True, nullable=False)
+    tokens: float
+    updated_at: float = Field(index=True)
+
+
 # device_id
 # system_device_id
 # idfa
@@ -7,7 +7,7 @@ from pydantic import BaseModel, EmailStr, validator, root_validator, AnyHttpUrl
 
 # # Package # #
 from app.user.model import UserBase
-from core.security import get_password_hash, create_password
+from core.security import create_password
 from core.logger import logger
 from core.base.model import BaseUUIDModel
 from core.base.schema import BaseMeta
@@ -83,11 +83,6 @@ class ICreate(BaseModel):
         values["allow_basic_login"] = True
         return values
 
-    @root_validator
-    def create_hashed_password(cls, values):
-        values["hashed_password"] = get_password_hash(values["password"])
-        return values
-
     @root_validator
     def create_full_name(cls, values):
         if "last_name" not in values:
@@ -20,7 +20,9 @@ from core.database.session import get_session
 
 __all__ = (
     "get_general_meta",
-    "get_current_user"
+    "get_current_user",
+    "get_principal",
+    "Principal",
 )
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -35,17 +37,46 @@ async def get_general_meta(
     return IMetaGeneral(roles=current_roles)
 
 
+class Principal:
+    """
+    Caller of a request: its access token and the verified claims, see `get_principal`
+    """
+    __slots__ = ("token", "payload")
+
+    def __init__(self, token: str, payload: dict):
+        self.token = token
+        self.payload = payload
+
+    @property
+    def user_id(self) -> str:
+        return self.payload["user_id"]
+
+
+async def get_principal(
+    request: Request,
+    db_session: AsyncSession = Depends(get_session),
+    access_token: str = Depends(reusable_oauth2)
+) -> Principal:
+    """
+    access token of the request verified once, signature and session, and kept on `request.state`
+    for every dependency and handler of the request
+    """
+    principal = getattr(request.state, "principal", None)
+    if principal is None or principal.token != access_token:
+        payload = await verify_jwt_token(token=access_token, token_type="access", db_session=db_session, crud=crud)
+        principal = request.state.principal = Principal(access_token, payload)
+    return principal
+
+
 def get_current_user(
     required_permissions: Optional[bool] = None
-) -> Callable[[Request, AsyncSession, str], Awaitable[User]]:
+) -> Callable[[Request, AsyncSession, Principal], Awaitable[User]]:
     async def current_user(
             request: Request,
             db_session: AsyncSession = Depends(get_session),
-            access_token: str = Depends(reusable_oauth2)
+            principal: Principal = Depends(get_principal)
     ) -> User:
-        payload = await verify_jwt_token(token=access_token, token_type="access", db_session=db_session, crud=crud)
-
-        user = await crud.user.get(db_session, id=payload["user_id"])
+        user = await crud.user.get(db_session, id=principal.user_id)
         if not user:
             raise NotFoundException(detail="User not found")
         if not user.sessions:
@@ -58,7 +89,7 @@ def get_current_user(
                 IRBACValidate.parse_obj({
                     "endpoint": str(request.url),
                     "method": request.method}),
-                access_token=access_token)
+                payload=principal.payload)
             if not data['access']:
                 raise ForbiddenException(detail="User does not have required permissions")
             # TODO validate visibility
@@ -1,14 +1,19 @@
 # # Native # #
+import json
+from typing import List, Optional
+from uuid import UUID
 
 # # Installed # #
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from sqlalchemy import text
 from sqlalchemy.orm import selectinload
 
 # # Package # #
 from app.visibility_group.schema import ICreate, IUpdate
 from core.base.crud import CRUDBase
 from app.visibility_group.model import Visibility_Group
+from core.constants import VISIBILITY_GROUP_ENTITY_POSSIBLE_VALUES
 
 
 class CRUD(CRUDBase[Visibility_Group, ICreate, IUpdate]):
@@ -20,5 +25,57 @@ class CRUD(CRUDBase[Visibility_Group, ICreate, IUpdate]):
         visibility_group = await db_session.exec(select(Visibility_Group).options(selectinload(Visibility_Group.user)))
         return visibility_group.all()
 
+    # users visible to :user_id, a member of the :prefix group, for an entity column: the group's own users
+    # (admin or user setting), those of descendants set to `parent` and of ancestors set to `child`,
+    # else only the caller (owner setting); `found` is false when the group does not exist
+    VISIBLE_USERS = """
+        WITH g AS (
+            SELECT id, admin, coalesce({entity}, '{{}}') AS settings FROM auth.visibility_group WHERE prefix = :prefix
+        ), own AS (
+            -- IS NOT DISTINCT FROM: a group without admin grants nothing, instead of a NULL dropping the owner row
+            SELECT ('admin' = ANY(settings) AND admin IS NOT DISTINCT FROM :user_id) OR 'user' = ANY(settings) AS granted
+            FROM g
+        ), visible_groups AS (
+            SELECT g.id FROM g, own WHERE own.granted
+            UNION
+            SELECT d.id FROM auth.visibility_group d
+            WHERE d.prefix LIKE :descendants AND 'parent' = ANY(coalesce(d.{entity}, '{{}}'))
+            UNION
+            SELECT a.id FROM auth.visibility_group a
+            WHERE a.prefix = ANY(:ancestors) AND 'child' = ANY(coalesce(a.{entity}, '{{}}'))
+        ), visible AS (
+            SELECT u.id, u.email FROM auth."user" u
+            WHERE u.visibility_group_id IN (SELECT id FROM visible_groups)
+            UNION
+            SELECT u.id, u.email FROM auth."user" u, g, own
+            WHERE u.id = :user_id AND 'owner' = ANY(g.settings) AND NOT own.granted
+        )
+        SELECT json_build_object(
+            'found', EXISTS (SELECT 1 FROM g),
+            'users', (SELECT coalesce(json_agg(json_build_object('id', id, 'email', email)), '[]') FROM visible)
+        )::text
+    """
+
+    async def get_visible_users(
+        self, db_session: AsyncSession, *, prefix: str, entity: str, user_id: UUID
+    ) -> Optional[List[dict]]:
+        """
+        users whose `entity` data the member `user_id` of the `prefix` group can access, resolved by one query
+        over the prefix hierarchy; None when the group does not exist
+        """
+        if entity not in VISIBILITY_GROUP_ENTITY_POSSIBLE_VALUES:
+            raise ValueError(f"Invalid visibility group entity: {entity}")
+        segments = prefix.split("/")
+        ancestors = ["/".join(segments[:n]) for n in range(1, len(segments))]
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        response = await db_session.execute(text(self.VISIBLE_USERS.format(entity=entity)), {
+            "prefix": prefix,
+            "descendants": f"{pattern}/%",
+            "ancestors": ancestors,
+            "user_id": user_id,
+        })
+        data = json.loads(response.scalar_one())
+        return data["users"] if data["found"] else None
+
 
 visibility_group = CRUD(Visibility_Group)
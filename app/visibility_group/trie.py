@@ -0,0 +1,72 @@
+# # Native # #
+from typing import Any, Dict, Iterator, List, Optional
+
+# # Installed # #
+
+# # Package # #
+
+__all__ = (
+    "PrefixTrie",
+)
+
+
+class Node:
+    __slots__ = ("children", "value")
+
+    def __init__(self):
+        self.children: Dict[str, "Node"] = {}
+        self.value: Optional[Any] = None
+
+
+class PrefixTrie:
+    """
+    Visibility groups by `/` separated prefix segments, built once per visibility snapshot.
+    Ancestors and descendants of a group are found in O(depth + results); `a/bc` is a sibling of `a/b`,
+    not a descendant.
+    """
+
+    def __init__(self):
+        self.root = Node()
+
+    @classmethod
+    def from_groups(cls, groups: Dict[str, Any]) -> "PrefixTrie":
+        """`groups`: prefix: group"""
+        trie = cls()
+        for prefix, group in groups.items():
+            trie.add(prefix, group)
+        return trie
+
+    def add(self, prefix: str, value: Any) -> None:
+        node = self.root
+        for segment in prefix.split("/"):
+            node = node.children.setdefault(segment, Node())
+        node.value = value
+
+    def ancestors(self, prefix: str) -> List[Any]:
+        """groups above `prefix`, the outermost first"""
+        values = []
+        node = self.root
+        for segment in prefix.split("/")[:-1]:
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.value is not None:
+                values.append(node.value)
+        return values
+
+    def descendants(self, prefix: str) -> List[Any]:
+        """groups below `prefix` at any depth, depth first in insertion order"""
+        node = self.root
+        for segment in prefix.split("/"):
+            node = node.children.get(segment)
+            if node is None:
+                return []
+        return list(self._walk(node))
+
+    def _walk(self, node: Node) -> Iterator[Any]:
+        stack = list(reversed(node.children.values()))
+        while stack:
+            node = stack.pop()
+            if node.value is not None:
+                yield node.value
+            stack.extend(reversed(node.children.values()))
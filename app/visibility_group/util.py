@@ -1,5 +1,6 @@
 # # Native # #
-from datetime import datetime
+from array import array
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 
 # # Installed # #
@@ -12,42 +13,153 @@ from core.security import verify_jwt_token
 from core.logger import logger
 from core.settings import settings
 from core.exceptions import ConflictException
-from app.visibility_group.schema import IVisibilityGroupSettings
-
-__all__ = ("VisibilityGroup",)
+from core.constants import VISIBILITY_GROUP_ENTITY_POSSIBLE_VALUES
+from core.refresh import RefreshCoordinator
+from app.visibility_group.schema import IVisibilityGroupSettings, UserIdentity
+from app.visibility_group.trie import PrefixTrie
+from app.policy.model import VISIBILITY_POLICY
+
+__all__ = (
+    "VisibilityGroup",
+    "VisibilitySnapshot",
+)
+
+
+class VisibilitySnapshot:
+    """
+    Visibility groups by prefix with the prefix trie and the visible users built from them once per load,
+    never modified once built
+    """
+
+    def __init__(
+        self, groups: Dict[str, IVisibilityGroupSettings], version: Optional[int] = None, resolve: bool = True
+    ):
+        """`resolve` false skips the visible users, for the SQL resolver which does not read them"""
+        self.groups = groups
+        self.version = version
+        self.trie = PrefixTrie.from_groups(groups)
+        # every user of the groups once, visible users are held as indexes into it
+        self.users: List[UserIdentity] = []
+        index: Dict[str, int] = {}
+        for group in groups.values():
+            for user in group.user:
+                if str(user["id"]) not in index:
+                    index[str(user["id"])] = len(self.users)
+                    self.users.append(user)
+        # (prefix, entity, admin): (indexes of the visible users, owner)
+        self.visible: Dict[Tuple[str, str, bool], Tuple[array, bool]] = {}
+        for prefix, group in groups.items() if resolve else ():
+            for entity in VISIBILITY_GROUP_ENTITY_POSSIBLE_VALUES:
+                member = self.visible[(prefix, entity, False)] = self.resolve(prefix, entity, False, index)
+                # the admin sees more than a member only when the entity grants "admin"
+                self.visible[(prefix, entity, True)] = (
+                    self.resolve(prefix, entity, True, index) if "admin" in getattr(group, entity) else member)
+
+    def visible_users(self, prefix: str, entity: str, admin: bool) -> Tuple[List[UserIdentity], bool]:
+        """
+        users visible to an admin or a member of the group for the entity, without duplicates,
+        and whether the caller sees their own data ("owner"), which depends on the caller and is not included
+        """
+        indexes, owner = self.visible[(prefix, entity, admin)]
+        return [self.users[i] for i in indexes], owner
+
+    def resolve(self, prefix: str, entity: str, admin: bool, index: Dict[str, int]) -> Tuple[array, bool]:
+        group = self.groups[prefix]
+        entity_settings = getattr(group, entity)
+        users: List[List[UserIdentity]] = []
+        owner = False
+        if "admin" in entity_settings and admin:
+            # the admin of the visibility group can access all the data in this group
+            users.append(group.user)
+        elif "user" in entity_settings:
+            users.append(group.user)
+        elif "owner" in entity_settings:
+            owner = True
+        # children granting their data to the parents, parents granting theirs to the children
+        users.extend(i.user for i in self.trie.descendants(prefix) if "parent" in getattr(i, entity))
+        users.extend(i.user for i in self.trie.ancestors(prefix) if "child" in getattr(i, entity))
+        unique = dict.fromkeys(index[str(user["id"])] for group_users in users for user in group_users)
+        return array("I", unique), owner
 
 
 class VisibilityGroup:
     def __init__(self):
-        self.visibility = {}
-        self.visibility_update_timestamp = 0
         self.VISIBILITY_UPDATE_DELAY = 1  # TODO: increase this to value
+        self.refresher: RefreshCoordinator[VisibilitySnapshot] = RefreshCoordinator(
+            "visibility_group", max_age=self.VISIBILITY_UPDATE_DELAY, max_stale=settings.POLICY_MAX_STALE_SECONDS)
+
+    @property
+    def visibility(self) -> Dict[str, IVisibilityGroupSettings]:
+        return self.refresher.value.groups if self.refresher.value else {}
 
     async def get(
         self,
         db_session: AsyncSession,
-    ):
-        if not self.visibility:
-            await self.update(db_session)
-            self.visibility_update_timestamp = int(datetime.now().timestamp())
-        if (
-            int(datetime.now().timestamp()) - self.visibility_update_timestamp
-        ) > self.VISIBILITY_UPDATE_DELAY:
-            await self.update(db_session)
-            self.visibility_update_timestamp = int(datetime.now().timestamp())
-        return self.visibility
+    ) -> Dict[str, IVisibilityGroupSettings]:
+        return (await self.get_snapshot(db_session)).groups
+
+    async def get_snapshot(
+        self,
+        db_session: AsyncSession,
+    ) -> VisibilitySnapshot:
+        """
+        current visibility groups, reloaded at most every VISIBILITY_UPDATE_DELAY seconds
+        by one request at a time, the others keep using the current ones meanwhile
+        """
+        return await self.refresher.get(lambda: self.refresh(db_session))
+
+    async def refresh(
+        self,
+        db_session: AsyncSession,
+    ) -> VisibilitySnapshot:
+        """groups are reloaded only when the `visibility` policy version has changed"""
+        snapshot = self.refresher.value
+        if snapshot:
+            version = await crud.policy.get_version(db_session, name=VISIBILITY_POLICY)
+            # without a version row (migration not applied) the groups are reloaded on every check
+            if version is not None and version == snapshot.version:
+                return snapshot
+        return await self.update(db_session)
 
     async def update(
         self,
         db_session: AsyncSession,
-    ):
-        self.visibility = await crud.visibility_group.get_visibility_group_and_users(
-            db_session
+    ) -> VisibilitySnapshot:
+        """
+        read the groups with one column-projected query, the settings are built without validation
+        and hold ids as strings, no ORM objects are kept
+        """
+        version, groups = await crud.policy.get_visibility_snapshot(db_session)
+        return VisibilitySnapshot(
+            {i["prefix"]: IVisibilityGroupSettings.construct(**i) for i in groups}, version,
+            resolve=settings.VISIBILITY_GROUP_RESOLVER == "memory")
+
+    async def resolve_memory(
+        self, db_session: AsyncSession, visibility_group_entity: str, payload: dict
+    ) -> Optional[List[UserIdentity]]:
+        """visible users from the in-process snapshot, None when the caller's group does not exist"""
+        snapshot = await self.get_snapshot(db_session)
+        visibility_group = snapshot.groups.get(payload["visibility_group"])
+        if visibility_group is None:
+            return None
+        logger.debug(f"User visibility group: {visibility_group}")
+
+        admin = str(visibility_group.admin) == str(payload["user_id"])
+        users, owner = snapshot.visible_users(visibility_group.prefix, visibility_group_entity, admin)
+        if owner and all(str(i["id"]) != str(payload["user_id"]) for i in users):
+            users.append({"id": UUID(payload["user_id"]), "email": payload["email"]})
+        return users
+
+    async def resolve_sql(
+        self, db_session: AsyncSession, visibility_group_entity: str, payload: dict
+    ) -> Optional[List[UserIdentity]]:
+        """visible users computed by Postgres over the prefix hierarchy, nothing is held in memory"""
+        return await crud.visibility_group.get_visible_users(
+            db_session,
+            prefix=payload["visibility_group"],
+            entity=visibility_group_entity,
+            user_id=UUID(payload["user_id"]),
         )
-        self.visibility = {
-            i.prefix: IVisibilityGroupSettings.parse_obj(i) for i in self.visibility
-        }
-        # logger.debug(f'Visibility group updated: {self.visibility}')
 
     async def get_from_api(self):
         async with httpx.ClientSession() as session:
@@ -57,68 +169,34 @@ class VisibilityGroup:
         return r["data"]
 
     async def validate(
-        self, db_session: AsyncSession, visibility_group_entity: str, access_token: str
+        self,
+        db_session: AsyncSession,
+        visibility_group_entity: str,
+        access_token: Optional[str] = None,
+        payload: Optional[dict] = None,
     ) -> dict:
         """
-        return the list of users whose data can be accessed by the user whose token is passed
+        return the list of users whose data can be accessed by the user whose token is passed,
+        `payload` are the claims of the already verified token
         """
 
         response = {"users": []}
 
-        payload = await verify_jwt_token(token=access_token, token_type="access", db_session=db_session, crud=crud)
+        if payload is None:
+            payload = await verify_jwt_token(token=access_token, token_type="access", db_session=db_session, crud=crud)
         if payload["visibility_group"] is None:
             raise ConflictException(detail="User has no visibility_group")
 
-        visibility_groups = await self.get(db_session)
-        if payload["visibility_group"] not in visibility_groups:
-            raise ConflictException(
-                detail="Visibility group user belongs to does not exist"
-            )
-
-        visibility_group = visibility_groups[payload["visibility_group"]].dict()
-
-        logger.debug(f"Visibility groups: {visibility_groups}")
-        logger.debug(f"User visibility group: {visibility_group}")
-
-        if visibility_group_entity not in visibility_group:
+        if visibility_group_entity not in VISIBILITY_GROUP_ENTITY_POSSIBLE_VALUES:
             raise ConflictException(detail="Visibility group entity does not exist")
 
-        if "admin" in visibility_group[visibility_group_entity] and str(
-            visibility_group["admin"]
-        ) == str(payload["user_id"]):
-            # if user is admin of the visibility group, he can access all the data in this group
-            response["users"].extend(visibility_group["user"])
-
-        elif "user" in visibility_group[visibility_group_entity]:
-            response["users"].extend(visibility_group["user"])
-
-        elif "owner" in visibility_group[visibility_group_entity]:
-            response["users"].extend(
-                [{"id": UUID(payload["user_id"]), "email": payload["email"]}]
+        resolve = self.resolve_sql if settings.VISIBILITY_GROUP_RESOLVER == "sql" else self.resolve_memory
+        users = await resolve(db_session, visibility_group_entity, payload)
+        if users is None:
+            raise ConflictException(
+                detail="Visibility group user belongs to does not exist"
             )
-
-        # looking for child visibility groups
-        for prefix, value in visibility_groups.items():
-            if (
-                prefix.startswith(visibility_group["prefix"])
-                and prefix != visibility_group["prefix"]
-            ):
-                value = value.dict()
-                if "parent" in value[visibility_group_entity]:
-                    response["users"].extend(value["user"])
-
-        # looking for parent visibility groups
-        parents_prefixes = []
-        for i in visibility_group["prefix"].split("/")[:-1]:
-            if len(parents_prefixes) == 0:
-                parents_prefixes.append(i)
-            else:
-                parents_prefixes.append(f"{parents_prefixes[-1]}/{i}")
-        for prefix, value in visibility_groups.items():
-            if prefix in parents_prefixes:
-                value = value.dict()
-                if "child" in value[visibility_group_entity]:
-                    response["users"].extend(value["user"])
+        response["users"] = users
 
         logger.debug(f"Visibility group response: {response}")
         return response
@@ -0,0 +1,45 @@
+"""
+Token issuance and verification throughput per core for each supported signing algorithm.
+
+    python -m benchmarks.jwt_algorithms [seconds per measurement]
+"""
+# # Native # #
+import sys
+import json
+import time
+
+# # Installed # #
+from cryptography.hazmat.primitives.asymmetric import rsa, ec, ed25519
+from jwt.algorithms import RSAAlgorithm, ECAlgorithm, OKPAlgorithm
+
+# # Package # #
+from core.keyring import KeyRing
+
+
+def throughput(func, seconds: float) -> float:
+    """calls per second on a single core"""
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        func()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main(seconds: float = 2.0) -> None:
+    jwks = [
+        json.loads(RSAAlgorithm.to_jwk(rsa.generate_private_key(public_exponent=65537, key_size=2048))),
+        json.loads(ECAlgorithm.to_jwk(ec.generate_private_key(ec.SECP256R1()))),
+        json.loads(OKPAlgorithm.to_jwk(ed25519.Ed25519PrivateKey.generate())),
+    ]
+    payload = {"exp": int(time.time()) + 3600, "sub": json.dumps({"user_id": "benchmark"}), "type": "access"}
+    print(f"{'algorithm':<10}{'sign/s':>12}{'verify/s':>12}")
+    for algorithm in ("RS256", "ES256", "EdDSA"):
+        keyring = KeyRing(jwks, algorithm=algorithm)
+        token = keyring.sign(payload)
+        sign = throughput(lambda: keyring.sign(payload), seconds)  # noqa: B023
+        verify = throughput(lambda: keyring.verify(token), seconds)  # noqa: B023
+        print(f"{algorithm:<10}{sign:>12.0f}{verify:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(*map(float, sys.argv[1:]))
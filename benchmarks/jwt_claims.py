@@ -0,0 +1,45 @@
+"""
+Access token size and verify + decode throughput per claims version, for a user with many roles.
+
+    python -m benchmarks.jwt_claims [roles] [seconds per measurement]
+"""
+# # Native # #
+import sys
+import json
+import time
+import uuid
+from types import SimpleNamespace
+
+# # Installed # #
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+# # Package # #
+from core.keyring import KeyRing
+from core.settings import settings
+from core.security import access_token_claims, token_payload
+from benchmarks.jwt_algorithms import throughput
+
+
+def main(roles: int = 30, seconds: float = 2.0) -> None:
+    keyring = KeyRing(json.loads(RSAAlgorithm.to_jwk(rsa.generate_private_key(public_exponent=65537, key_size=2048))))
+    user = SimpleNamespace(
+        id=uuid.uuid4(),
+        email="benchmark@example.com",
+        roles=[SimpleNamespace(id=uuid.uuid4(), title=f"Benchmark role {i}") for i in range(int(roles))],
+        teams=[SimpleNamespace(id=uuid.uuid4()) for _ in range(5)],
+        visibility_group=SimpleNamespace(prefix="root.benchmark"),
+    )
+    print(f"{'version':<10}{'bytes':>8}{'verify/s':>12}")
+    for version in (1, 2):
+        settings.ACCESS_TOKEN_CLAIMS_VERSION = version
+        claims = access_token_claims(user)
+        payload = {"exp": int(time.time()) + 3600, "type": "access"}
+        payload.update(claims) if version >= 2 else payload.update(sub=json.dumps(claims))
+        token = keyring.sign(payload)
+        verify = throughput(lambda: token_payload(keyring.verify(token)), seconds)  # noqa: B023
+        print(f"{version:<10}{len(token):>8}{verify:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(*map(float, sys.argv[1:]))
@@ -0,0 +1,47 @@
+"""
+Per-token sign/verify cost: PEM bytes passed to PyJWT on every call (previous behaviour)
+versus key objects held by the key ring.
+
+    python -m benchmarks.jwt_signing [iterations]
+"""
+# # Native # #
+import sys
+import json
+import time
+
+# # Installed # #
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+# # Package # #
+from core.keyring import KeyRing
+
+
+def measure(func, iterations: int) -> float:
+    """microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main(iterations: int = 500) -> None:
+    jwk = json.loads(RSAAlgorithm.to_jwk(rsa.generate_private_key(public_exponent=65537, key_size=2048)))
+    keyring = KeyRing(jwk)
+    private_pem, public_pem = keyring.signing_key.private_pem, keyring.signing_key.public_pem
+    payload = {"exp": int(time.time()) + 3600, "sub": json.dumps({"user_id": "benchmark"}), "type": "access"}
+    token = keyring.sign(payload)
+
+    results = {
+        "sign, PEM per call": measure(lambda: jwt.encode(payload, private_pem, algorithm="RS256"), iterations),
+        "sign, key ring": measure(lambda: keyring.sign(payload), iterations),
+        "verify, PEM per call": measure(lambda: jwt.decode(token, public_pem, algorithms=["RS256"]), iterations),
+        "verify, key ring": measure(lambda: keyring.verify(token), iterations),
+    }
+    for name, value in results.items():
+        print(f"{name:<24}{value:>10.1f} us/token")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,75 @@
+"""
+RBAC resource lookup: the per-request regex scan over all resources against the compiled route matcher.
+
+    python -m benchmarks.rbac_matcher [resources] [seconds per measurement]
+"""
+# # Native # #
+import re
+import sys
+import uuid
+import random
+
+# # Installed # #
+
+# # Package # #
+from app.rbac.matcher import RouteMatcher, PLACEHOLDERS
+from benchmarks.jwt_algorithms import throughput
+
+METHODS = ("get", "post", "put", "delete", "patch")
+
+
+def make_resources(count: int) -> dict:
+    """REST-like endpoints: /api/<service>/v1/<entity>[/$uuid$[/<sub>[/$str$]]]"""
+    rnd = random.Random(0)
+    resources = {}
+    while len(resources) < count:
+        endpoint = f"/api/service{rnd.randrange(50)}/v1/entity{rnd.randrange(100)}"
+        depth = rnd.randrange(4)
+        if depth > 0:
+            endpoint += "/$uuid$"
+        if depth > 1:
+            endpoint += f"/sub{rnd.randrange(10)}"
+        if depth > 2:
+            endpoint += "/$str$"
+        resources[str(uuid.UUID(int=rnd.getrandbits(128)))] = {"endpoint": endpoint, "method": rnd.choice(METHODS)}
+    return resources
+
+
+def scan(resources: dict, method: str, path: str):
+    """lookup as done before the matcher: patterns rebuilt and matched for every resource"""
+    for resource_id, resource in resources.items():
+        if resource["method"] != method:
+            continue
+        endpoint = resource["endpoint"]
+        for pattern, regexp in PLACEHOLDERS.items():
+            endpoint = endpoint.replace(pattern, regexp)
+        if re.fullmatch(endpoint, path):
+            return resource_id
+    return None
+
+
+def main(resources: int = 10000, seconds: float = 2.0) -> None:
+    data = make_resources(int(resources))
+    matcher = RouteMatcher.from_resources(data)
+    rnd = random.Random(1)
+    requests = []
+    for resource in rnd.sample(list(data.values()), 100):
+        path = resource["endpoint"].replace("$uuid$", str(uuid.uuid4())).replace("$str$", "name")
+        requests.append((resource["method"], path))
+    requests.append(("get", "/api/unknown/v1/path"))
+    for method, path in requests:
+        # generated endpoints never overlap, apart from duplicates where both keep the first resource
+        assert matcher.match(method, path) == scan(data, method, path)
+
+    def run(lookup):
+        for method, path in requests:
+            lookup(method, path)
+
+    before = throughput(lambda: run(lambda m, p: scan(data, m, p)), seconds) * len(requests)
+    after = throughput(lambda: run(matcher.match), seconds) * len(requests)
+    print(f"{'resources':<12}{'scan/s':>12}{'matcher/s':>14}{'speedup':>10}")
+    print(f"{len(data):<12}{before:>12.0f}{after:>14.0f}{after / before:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main(*map(float, sys.argv[1:]))
@@ -0,0 +1,60 @@
+"""
+Visibility group hierarchy lookup: the scans over all groups against the prefix trie.
+
+    python -m benchmarks.visibility_trie [branching] [depth] [seconds per measurement]
+"""
+# # Native # #
+import sys
+import random
+
+# # Installed # #
+
+# # Package # #
+from app.visibility_group.trie import PrefixTrie
+from benchmarks.jwt_algorithms import throughput
+
+
+def make_prefixes(branching: int, depth: int) -> list:
+    """org tree with `branching` child groups per group down to `depth` levels"""
+    prefixes, level = [], ["org"]
+    for _ in range(depth):
+        prefixes.extend(level)
+        level = [f"{prefix}/unit{i}" for prefix in level for i in range(branching)]
+    return prefixes
+
+
+def scan(groups: dict, prefix: str) -> tuple:
+    """lookup as done before the trie: a child scan by `startswith` and a parent scan"""
+    children = [v for k, v in groups.items() if k.startswith(prefix) and k != prefix]
+    parents_prefixes = []
+    for i in prefix.split("/")[:-1]:
+        parents_prefixes.append(f"{parents_prefixes[-1]}/{i}" if parents_prefixes else i)
+    parents = [v for k, v in groups.items() if k in parents_prefixes]
+    return children, parents
+
+
+def main(branching: int = 8, depth: int = 6, seconds: float = 2.0) -> None:
+    groups = {i: i for i in make_prefixes(int(branching), int(depth))}
+    trie = PrefixTrie.from_groups(groups)
+    rnd = random.Random(0)
+    # mostly leaf and near-leaf groups, as most users are
+    prefixes = rnd.sample(list(groups), 100)
+    for prefix in prefixes:
+        children, parents = scan(groups, prefix)
+        # no sibling of a generated prefix extends its name (unit1 vs unit10 needs branching > 10)
+        if int(branching) <= 10:
+            assert sorted(children) == sorted(trie.descendants(prefix))
+        assert parents == trie.ancestors(prefix)
+
+    def run(lookup):
+        for prefix in prefixes:
+            lookup(prefix)
+
+    before = throughput(lambda: run(lambda p: scan(groups, p)), seconds) * len(prefixes)
+    after = throughput(lambda: run(lambda p: (trie.descendants(p), trie.ancestors(p))), seconds) * len(prefixes)
+    print(f"{'groups':<12}{'scan/s':>12}{'trie/s':>14}{'speedup':>10}")
+    print(f"{len(groups):<12}{before:>12.0f}{after:>14.0f}{after / before:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main(*map(float, sys.argv[1:]))
@@ -1,3 +1,5 @@
 VISIBILITY_GROUP_ENTITY_SETTINGS = ['admin', 'owner', 'user', 'parent', 'child']
 AMOUNT_OF_SESSSIONS_PER_USER = 4
 VISIBILITY_GROUP_ENTITY_POSSIBLE_VALUES = ['opportunity', 'property', 'seller', 'activity']
+TOKEN_VERIFY_BATCH_LIMIT = 100
+RBAC_VALIDATE_BATCH_LIMIT = 100
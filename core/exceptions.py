@@ -1,3 +1,6 @@
+# # Native # #
+from typing import Optional
+
 # # Installed # #
 from fastapi import HTTPException
 from fastapi import status as statuscode
@@ -17,6 +20,7 @@ __all__ = (
     "BadRequestException",
     "ConflictException",
     "AlreadyExistsException",
+    "TooManyRequestsException",
 )
 
 
@@ -96,3 +100,13 @@ class AlreadyExistsException(BaseIdentifiedException):
     detail = "The entity already exists"
     status_code = statuscode.HTTP_409_CONFLICT
     model = AlreadyExistsError
+
+
+class TooManyRequestsException(BaseIdentifiedException):
+    """Error raised when a client exceeds a rate limit"""
+    detail = "Too many requests"
+    status_code = statuscode.HTTP_429_TOO_MANY_REQUESTS
+
+    def __init__(self, retry_after: Optional[int] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.headers = {"Retry-After": str(retry_after)} if retry_after else None
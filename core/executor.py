@@ -0,0 +1,76 @@
+# # Native # #
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# # Installed # #
+
+# # Package # #
+from core.settings import settings
+
+__all__ = (
+    "CryptoExecutor",
+    "crypto_executor",
+)
+
+
+class CryptoExecutor:
+    """
+    Bounded thread pool for CPU-heavy crypto (bcrypt, RSA/EC signing), so it does not block the event loop.
+    bcrypt and cryptography release the GIL, threads run the work in parallel without pickling keys
+    to worker processes. At most `max_workers` calls run at once, the rest wait in the pool queue.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.queued = 0
+        self.max_queued = 0
+        self.running = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crypto")
+
+    def _start(self, state: dict) -> bool:
+        with self._lock:
+            if state["started"]:
+                return False
+            state["started"] = True
+            self.queued -= 1
+            return True
+
+    def _call(self, state: dict, func: Callable, args: tuple) -> Any:
+        self._start(state)
+        with self._lock:
+            self.running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        state = {"started": False}
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, state, func, args)
+        except asyncio.CancelledError:
+            # cancelled while waiting in the queue, the call will never start
+            self._start(state)
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "running": self.running,
+            "completed": self.completed,
+        }
+
+
+crypto_executor = CryptoExecutor(max_workers=settings.CRYPTO_EXECUTOR_WORKERS or min(4, os.cpu_count() or 1))
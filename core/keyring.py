@@ -0,0 +1,146 @@
+# # Native # #
+import json
+import base64
+import hashlib
+from typing import Dict, List, Optional, Union
+
+# # Installed # #
+import jwt
+from jwt.algorithms import RSAAlgorithm, ECAlgorithm, OKPAlgorithm
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.serialization import NoEncryption
+
+# # Package # #
+from core.utils import jwk2key
+
+__all__ = (
+    "SigningKey",
+    "KeyRing",
+)
+
+# members of the JWK thumbprint (RFC 7638) per key type
+THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y"), "OKP": ("crv", "kty", "x")}
+# signing algorithm per key type and curve
+ALGORITHMS = {("RSA", None): "RS256", ("EC", "P-256"): "ES256", ("OKP", "Ed25519"): "EdDSA"}
+JWK_SERIALIZERS = {"RSA": RSAAlgorithm, "EC": ECAlgorithm, "OKP": OKPAlgorithm}
+
+
+def jwk_thumbprint(jwk: dict) -> str:
+    members = {k: jwk[k] for k in THUMBPRINT_MEMBERS[jwk["kty"]]}
+    digest = hashlib.sha256(json.dumps(members, separators=(",", ":"), sort_keys=True).encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class SigningKey:
+    """
+    JWK parsed into cryptography key objects once, so PyJWT does not load a PEM on every call
+    """
+
+    def __init__(self, jwk: dict):
+        algorithm = ALGORITHMS.get((jwk.get("kty"), jwk.get("crv")))
+        if not algorithm:
+            raise ValueError(f"Unsupported key type: {jwk.get('kty')} {jwk.get('crv') or ''}")
+        self.kty = jwk["kty"]
+        self.kid = jwk.get("kid") or jwk_thumbprint(jwk)
+        self.algorithm = algorithm
+        keys = jwk2key(jwk)
+        self.public_key = keys["PUBLIC_KEY"]
+        self.private_key = keys["PRIVATE_KEY"]
+
+    @property
+    def public_jwk(self) -> dict:
+        jwk = json.loads(JWK_SERIALIZERS[self.kty].to_jwk(self.public_key))
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+    @property
+    def public_pem(self) -> bytes:
+        return self.public_key.public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+
+    @property
+    def private_pem(self) -> Optional[bytes]:
+        if not self.private_key:
+            return None
+        return self.private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=NoEncryption()
+        )
+
+
+class KeyRing:
+    """
+    Set of keys selected by the `kid` token header.
+    Tokens are signed with the active key, any key of the ring verifies tokens it signed,
+    so a new key can be rolled out next to the old one and `load` swaps the set at runtime
+    (`core.security.reload_keyring`).
+    """
+
+    def __init__(
+        self, jwks: Union[dict, List[dict]], active_kid: Optional[str] = None, algorithm: Optional[str] = None
+    ):
+        self.keys: Dict[str, SigningKey] = {}
+        self.signing_key: Optional[SigningKey] = None
+        self.jwks: dict = {"keys": []}
+        self.jwks_etag = ""
+        self.load(jwks, active_kid, algorithm)
+
+    @classmethod
+    def from_json(cls, jwks: str, active_kid: Optional[str] = None, algorithm: Optional[str] = None) -> "KeyRing":
+        return cls(json.loads(jwks), active_kid, algorithm)
+
+    def load(
+        self, jwks: Union[dict, List[dict]], active_kid: Optional[str] = None, algorithm: Optional[str] = None
+    ) -> None:
+        """
+        accepts a single JWK, a list of JWKs or a JWK set ({"keys": [...]});
+        the signing key is `active_kid`, else the first private key of `algorithm`, else the first private key
+        """
+        if isinstance(jwks, dict):
+            jwks = jwks.get("keys", [jwks])
+        keys = {}
+        for jwk in jwks:
+            key = SigningKey(jwk)
+            keys[key.kid] = key
+        if active_kid:
+            signing_key = keys.get(active_kid)
+        else:
+            signing_key = next(
+                (i for i in keys.values() if i.private_key and algorithm in (None, i.algorithm)), None)
+        if not signing_key or not signing_key.private_key:
+            raise ValueError(f"No private signing key found, active kid: {active_kid}, algorithm: {algorithm}")
+        # public JWK set, the signing key first
+        jwks = {"keys": [signing_key.public_jwk] + [i.public_jwk for i in keys.values() if i is not signing_key]}
+        etag = hashlib.sha256(json.dumps(jwks, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+        self.keys, self.signing_key, self.jwks, self.jwks_etag = keys, signing_key, jwks, f'"{etag}"'
+
+    def replace(self, ring: "KeyRing") -> None:
+        """take the keys of another ring, loaded elsewhere"""
+        self.keys, self.signing_key, self.jwks, self.jwks_etag = ring.keys, ring.signing_key, ring.jwks, ring.jwks_etag
+
+    def get(self, kid: str) -> SigningKey:
+        key = self.keys.get(kid)
+        if not key:
+            raise jwt.InvalidTokenError(f"Unknown key id: {kid}")
+        return key
+
+    def sign(self, payload: dict) -> str:
+        key = self.signing_key
+        return jwt.encode(payload, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+    def verify(self, token: str, options: Optional[dict] = None) -> dict:
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid:
+            key = self.get(kid)
+            return jwt.decode(token, key.public_key, algorithms=[key.algorithm], options=options)
+        # tokens issued before key ids were introduced
+        error = jwt.InvalidTokenError("No verification key")
+        for key in self.keys.values():
+            try:
+                return jwt.decode(token, key.public_key, algorithms=[key.algorithm], options=options)
+            except (jwt.InvalidSignatureError, jwt.InvalidAlgorithmError) as e:
+                error = e
+        raise error
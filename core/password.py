@@ -0,0 +1,43 @@
+# # Native # #
+import math
+import time
+
+# # Installed # #
+from passlib.context import CryptContext
+
+# # Package # #
+
+__all__ = (
+    "PASSWORD_SCHEMES",
+    "calibrate_cost",
+)
+
+# bcrypt is kept in the context so existing hashes verify and get upgraded when argon2 is the default
+PASSWORD_SCHEMES = {"bcrypt": ["bcrypt"], "argon2": ["argon2", "bcrypt"]}
+# cost range per scheme: bcrypt rounds (log2 of iterations), argon2 time cost (passes over memory)
+COST_RANGES = {"bcrypt": (10, 16), "argon2": (2, 16)}
+
+
+def measure(context: CryptContext, scheme: str, cost: int, samples: int = 3) -> float:
+    """fastest of `samples` hashes at the given cost, milliseconds"""
+    handler = context.handler(scheme).using(rounds=cost)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash("calibration")
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def calibrate_cost(context: CryptContext, scheme: str, target_ms: float) -> int:
+    """
+    highest cost whose hash stays within `target_ms` on this machine, never below the scheme minimum.
+    Measured once at the minimum cost and extrapolated: bcrypt time doubles per round, argon2 grows linearly.
+    """
+    low, high = COST_RANGES[scheme]
+    elapsed = measure(context, scheme, low)
+    if scheme == "bcrypt":
+        cost = low + math.floor(math.log2(target_ms / elapsed)) if target_ms > elapsed else low
+    else:
+        cost = math.floor(low * target_ms / elapsed)
+    return max(low, min(high, cost))
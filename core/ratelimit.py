@@ -0,0 +1,136 @@
+# # Native # #
+import math
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+# # Installed # #
+from sqlalchemy import text
+
+# # Package # #
+from core.cache import TTLCache
+from core.database.database import async_engine
+from core.exceptions import TooManyRequestsException
+from core.settings import settings
+
+__all__ = (
+    "MemoryBackend",
+    "DatabaseBackend",
+    "RateLimiter",
+    "login_limiter",
+)
+
+# limits are attempts per window, the bucket holds one window of attempts and refills over the window
+RATE_LIMIT_WINDOW = 60
+
+
+def refill(bucket: Optional[Tuple[float, float]], capacity: int, rate: float, now: float) -> float:
+    """tokens in the bucket at `now`, a missing bucket is full"""
+    if not bucket:
+        return capacity
+    tokens, updated_at = bucket
+    return min(capacity, tokens + (now - updated_at) * rate)
+
+
+class MemoryBackend:
+    """
+    Token buckets of this worker, a bucket is dropped once it has refilled.
+    """
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 100000):
+        self.buckets = TTLCache(maxsize=maxsize, ttl=RATE_LIMIT_WINDOW)
+
+    async def acquire(self, key: str, capacity: int, rate: float) -> float:
+        """take a token from the bucket, returns 0 or seconds until a token is available"""
+        now = time.time()
+        tokens = refill(self.buckets.get(key), capacity, rate, now)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        tokens -= 1
+        self.buckets.set(key, (tokens, now), expires_at=now + (capacity - tokens) / rate)
+        return 0
+
+
+class DatabaseBackend:
+    """
+    Token buckets in `auth.login_rate_limit`, shared by every worker.
+    A token is taken in a single statement, the row lock serializes concurrent attempts on the same key.
+    """
+
+    name = "database"
+
+    ACQUIRE = text("""
+        WITH previous AS (
+            SELECT tokens, updated_at FROM auth.login_rate_limit WHERE key = :key FOR UPDATE
+        )
+        INSERT INTO auth.login_rate_limit AS bucket (key, tokens, updated_at)
+        VALUES (:key, CAST(:capacity AS double precision) - 1, CAST(:now AS double precision))
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = CASE
+                WHEN LEAST(:capacity, bucket.tokens + (:now - bucket.updated_at) * :rate) >= 1
+                THEN LEAST(:capacity, bucket.tokens + (:now - bucket.updated_at) * :rate) - 1
+                ELSE bucket.tokens END,
+            updated_at = CASE
+                WHEN LEAST(:capacity, bucket.tokens + (:now - bucket.updated_at) * :rate) >= 1
+                THEN :now
+                ELSE bucket.updated_at END
+        RETURNING (SELECT tokens FROM previous), (SELECT updated_at FROM previous)
+    """)
+    CLEANUP = text("DELETE FROM auth.login_rate_limit WHERE updated_at < :before")
+
+    def __init__(self):
+        self.cleanup_timestamp = 0
+
+    async def acquire(self, key: str, capacity: int, rate: float) -> float:
+        now = time.time()
+        async with async_engine.begin() as conn:
+            if now - self.cleanup_timestamp > RATE_LIMIT_WINDOW:
+                # buckets untouched for a window are full, same as missing ones
+                self.cleanup_timestamp = now
+                await conn.execute(self.CLEANUP, {"before": now - RATE_LIMIT_WINDOW})
+            response = await conn.execute(self.ACQUIRE, {"key": key, "capacity": float(capacity), "rate": rate, "now": now})
+            previous = response.one()
+        tokens = refill(previous if previous[0] is not None else None, capacity, rate, now)
+        return 0 if tokens >= 1 else (1 - tokens) / rate
+
+
+class RateLimiter:
+    """
+    Token bucket per key kind and value, e.g. `email` and `ip` of a login attempt.
+    `limits` maps the key kind to attempts per RATE_LIMIT_WINDOW, 0 disables the kind.
+    """
+
+    def __init__(self, backend, limits: Dict[str, int]):
+        self.backend = backend
+        self.limits = limits
+        self.allowed = 0
+        self.rejected = Counter()
+
+    async def check(self, **keys: Optional[str]) -> None:
+        """take a token for every key, raises TooManyRequestsException when a bucket is empty"""
+        for kind, value in keys.items():
+            capacity = self.limits.get(kind)
+            if not capacity or not value:
+                continue
+            retry_after = await self.backend.acquire(f"{kind}:{value}", capacity, capacity / RATE_LIMIT_WINDOW)
+            if retry_after:
+                self.rejected[kind] += 1
+                raise TooManyRequestsException(
+                    detail="Too many login attempts", retry_after=math.ceil(retry_after))
+        self.allowed += 1
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "limits": self.limits,
+            "allowed": self.allowed,
+            "rejected": dict(self.rejected),
+        }
+
+
+login_limiter = RateLimiter(
+    backend=DatabaseBackend() if settings.LOGIN_RATE_LIMIT_BACKEND == "database" else MemoryBackend(),
+    limits={"ip": settings.LOGIN_RATE_LIMIT_IP, "email": settings.LOGIN_RATE_LIMIT_EMAIL},
+)
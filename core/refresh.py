@@ -0,0 +1,87 @@
+# # Native # #
+import time
+import asyncio
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+# # Installed # #
+
+# # Package # #
+from core.logger import logger
+
+__all__ = ("RefreshCoordinator",)
+
+T = TypeVar("T")
+
+
+class RefreshCoordinator(Generic[T]):
+    """
+    Holds the current snapshot of an in-process cache and coordinates its refreshes:
+
+    * single flight: one refresh at a time, started by the first request that finds the snapshot older than `max_age`;
+    * stale while revalidate: other requests keep the current snapshot until the refreshed one replaces it,
+      only the very first load is waited for;
+    * when a refresh fails, the last good snapshot is served for up to `max_stale` seconds after it was loaded,
+      retried every `max_age`; after that the error is raised to the caller.
+
+    Snapshots are replaced, never modified, so a reader keeps a consistent snapshot for the whole request.
+    """
+
+    def __init__(self, name: str, max_age: float, max_stale: float):
+        self.name = name
+        self.max_age = max_age
+        self.max_stale = max_stale
+        self.value: Optional[T] = None
+        self.loaded_at = 0.0
+        self.checked_at = 0.0
+        self.refreshes = 0
+        self.failures = 0
+        self._future: Optional[asyncio.Future] = None
+
+    def is_fresh(self) -> bool:
+        return self.value is not None and time.monotonic() - self.checked_at < self.max_age
+
+    async def get(self, refresh: Callable[[], Awaitable[T]]) -> T:
+        """current snapshot, `refresh` returns the new one and is called when the current one is too old"""
+        if self.is_fresh():
+            return self.value
+        if self._future is not None:
+            if self.value is not None:
+                return self.value
+            return await asyncio.shield(self._future)
+        return await self._refresh(refresh)
+
+    def set(self, value: T) -> None:
+        """replace the snapshot with one loaded elsewhere, e.g. from a file at startup"""
+        self.value = value
+        self.loaded_at = self.checked_at = time.monotonic()
+
+    async def _refresh(self, refresh: Callable[[], Awaitable[T]]) -> T:
+        future = self._future = asyncio.get_running_loop().create_future()
+        try:
+            value = await refresh()
+        except BaseException as e:
+            self.failures += 1
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError(f"{self.name} refresh cancelled"))
+            future.exception()  # retrieved, when nobody waits for it
+            now = time.monotonic()
+            if isinstance(e, Exception) and self.value is not None and now - self.loaded_at < self.max_stale:
+                logger.error(f"{self.name} refresh failed, serving the snapshot of {now - self.loaded_at:.0f}s ago: {e}")
+                self.checked_at = now
+                return self.value
+            raise
+        else:
+            self.refreshes += 1
+            self.value = value
+            self.loaded_at = self.checked_at = time.monotonic()
+            future.set_result(value)
+            return value
+        finally:
+            self._future = None
+
+    def stats(self) -> dict:
+        return {
+            "age": round(time.monotonic() - self.loaded_at, 3) if self.value is not None else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "refreshing": self._future is not None,
+        }
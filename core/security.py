@@ -1,8 +1,17 @@
 # # Native # #
 import json
+import asyncio
 import random
+import time
+import hmac
+import base64
+import hashlib
+import secrets
 import string
-from datetime import datetime, timedelta
+import uuid
+from uuid import UUID
+from datetime import timedelta
+from typing import List, Optional, Tuple, Union
 
 
 # # Installed # #
@@ -11,76 +20,338 @@ from passlib.context import CryptContext
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 # # Package # #
-from core.settings import settings
+from core.settings import settings, Settings
 from core.logger import logger
 from core.exceptions import UnauthorizedException
+from core.cache import TTLCache
+from core.keyring import KeyRing
+from core.executor import crypto_executor
+from core.password import PASSWORD_SCHEMES, calibrate_cost
 # from app import crud
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# every scheme but the configured one is deprecated, so `verify_and_update` upgrades old hashes
+pwd_context = CryptContext(schemes=PASSWORD_SCHEMES[settings.PASSWORD_HASH_SCHEME], deprecated="auto")
+
+# token signing keys, parsed once and selected by the `kid` header, `reload_keyring` swaps them at runtime
+keyring = KeyRing.from_json(settings.JWK, active_kid=settings.JWK_ACTIVE_KID, algorithm=settings.JWT_ALGORITHM)
+
+# HMAC key of the `auth` cookie, derived from the signing key unless COOKIE_SECRET is set
+cookie_secret = hmac.new(
+    settings.COOKIE_SECRET.encode() if settings.COOKIE_SECRET else keyring.signing_key.private_pem,
+    b"auth-cookie",
+    hashlib.sha256,
+).digest()
+
+# verified token claims, keyed by (token digest, token type)
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL)
 
 __all__ = (
     "create_cookie",
+    "verify_cookie",
     "create_jwt_token",
+    "access_token_claims",
+    "get_unverified_claims",
     "verify_jwt_token",
+    "verify_jwt_tokens",
+    "token_digest",
+    "invalidate_token",
+    "token_cache",
+    "keyring",
+    "reload_keyring",
+    "reload_keyring_periodically",
     "create_password",
     "get_password_hash",
     "verify_password",
+    "verify_and_update_password",
+    "configure_password_hashing",
 )
 
 
-def create_cookie():
-    return pwd_context.hash(''.join(random.choice(string.ascii_letters) for i in range(150)))
+def _cookie_signature(cookie_id: str) -> str:
+    digest = hmac.new(cookie_secret, cookie_id.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def create_cookie(cookie_id: Optional[str] = None) -> str:
+    """opaque `<id>.<signature>` cookie with a new id or the given one, sessions store the id only"""
+    cookie_id = cookie_id or secrets.token_urlsafe(32)
+    return f"{cookie_id}.{_cookie_signature(cookie_id)}"
+
 
+def verify_cookie(cookie: Optional[str]) -> Optional[str]:
+    """id of a cookie issued by this service, None for missing or forged cookies"""
+    if not cookie:
+        return None
+    cookie_id, _, signature = cookie.rpartition(".")
+    if not cookie_id or not hmac.compare_digest(signature, _cookie_signature(cookie_id)):
+        return None
+    return cookie_id
 
-def create_jwt_token(subject: dict, expires_delta: timedelta, token_type: str) -> str:
-    # expire = datetime.utcnow() + expires_delta
-    expire = int((datetime.utcnow() + expires_delta).timestamp())
-    to_encode = {"exp": expire, "sub": json.dumps(subject), "type": token_type}
-    encoded_jwt = jwt.encode(to_encode, settings.PEM_PRIVATE_KEY, algorithm="RS256")
+
+def access_token_claims(user) -> dict:
+    """
+    access token subject of the user in the ACCESS_TOKEN_CLAIMS_VERSION format.
+    v1 is JSON in `sub` with role titles; v2 is top-level claims, role and team id lists without titles
+    """
+    if settings.ACCESS_TOKEN_CLAIMS_VERSION == 2:
+        return {
+            "ver": 2,
+            "sub": str(user.id),
+            "email": user.email,
+            "rol": [str(i.id) for i in user.roles],
+            "tms": [str(i.id) for i in user.teams],
+            "vg": user.visibility_group.prefix if user.visibility_group else None,
+        }
+    return {
+        "user_id": str(user.id),
+        "email": user.email,
+        "roles": {str(i.id): i.title for i in user.roles},
+        "teams": [str(i.id) for i in user.teams],
+        "visibility_group": user.visibility_group.prefix if user.visibility_group else None
+    }
+
+
+def token_payload(claims: dict) -> dict:
+    """token claims in the v1 payload shape, role titles of v2 tokens are None"""
+    if claims.get("ver", 1) < 2:
+        return json.loads(claims["sub"])
+    return {
+        "user_id": claims["sub"],
+        "email": claims.get("email"),
+        "roles": dict.fromkeys(claims["rol"]),
+        "teams": claims["tms"],
+        "visibility_group": claims.get("vg"),
+    }
+
+
+async def create_jwt_token(
+    subject: dict, expires_delta: timedelta, token_type: str, session_id: Optional[Union[UUID, str]] = None
+) -> Tuple[str, int]:
+    """`subject` goes to `sub` as JSON, unless it is a v2+ claim set (`ver`), which is merged into the token"""
+    issued_at = int(time.time())
+    expire = issued_at + int(expires_delta.total_seconds())
+    to_encode = {
+        "exp": expire,
+        "iat": issued_at,
+        "jti": uuid.uuid4().hex,
+        "type": token_type,
+    }
+    if subject.get("ver", 1) >= 2:
+        to_encode.update(subject)
+    else:
+        to_encode["sub"] = json.dumps(subject)
+    if session_id:
+        to_encode["sid"] = str(session_id)
+    encoded_jwt = await crypto_executor.run(keyring.sign, to_encode)
     return encoded_jwt, expire
 
 
+def get_unverified_claims(token: str) -> dict:
+    """read claims of a token issued by this service, without checking the signature"""
+    return jwt.decode(token, options={"verify_signature": False, "verify_exp": False})
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def invalidate_token(digest: str) -> None:
+    """drop cached claims of the token with the given digest, e.g. when its session is removed"""
+    for token_type in ("access", "refresh"):
+        token_cache.pop((digest, token_type))
+
+
+def read_keyring() -> KeyRing:
+    """key ring of the secrets read again, blocking: the secret stores are called over the network"""
+    current = Settings()
+    return KeyRing.from_json(current.JWK, active_kid=current.JWK_ACTIVE_KID, algorithm=current.JWT_ALGORITHM)
+
+
+async def reload_keyring() -> None:
+    """
+    swap the keys of the ring for the ones of the secrets, cached claims are dropped so tokens of a removed key
+    stop verifying at once; when the new JWK does not load the current keys are kept.
+    Only the secrets are read in the default executor, the ring and the token cache are replaced on the loop
+    thread, where requests read them.
+    """
+    try:
+        ring = await asyncio.get_running_loop().run_in_executor(None, read_keyring)
+    except Exception as e:
+        logger.error(f"key ring reload failed, keeping the keys {list(keyring.keys)}: {e}")
+        return
+    keyring.replace(ring)
+    token_cache.clear()
+    logger.info(f"key ring reloaded, keys {list(keyring.keys)}, signing key {keyring.signing_key.kid}")
+
+
+async def reload_keyring_periodically(interval: int) -> None:
+    """`reload_keyring` every `interval` seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        await reload_keyring()
+
+
+def check_access_payload(payload: dict) -> dict:
+    if not set(["user_id", "roles", "teams", "visibility_group"]).issubset(payload.keys()):
+        raise UnauthorizedException(detail="Invalid token payload")
+    if not isinstance(payload['roles'], dict):
+        raise UnauthorizedException(detail="Invalid token payload roles")
+    return payload
+
+
+def token_error(error: Exception) -> UnauthorizedException:
+    if isinstance(error, UnauthorizedException):
+        return error
+    if isinstance(error, jwt.ExpiredSignatureError):
+        return UnauthorizedException(detail="Token expired")
+    return UnauthorizedException(detail=f"Invalid token: {error}")
+
+
+async def is_session_revoked(
+    db_session: AsyncSession, crud, session_id: Optional[str], issued_at: int, jti: Optional[str]
+) -> bool:
+    """access tokens with a session id are checked against the in-process session revocation index"""
+    return bool(session_id) and await crud.sessions.is_revoked(
+        db_session, session_id=session_id, issued_at=issued_at, jti=jti)
+
+
 async def verify_jwt_token(token: str, token_type: str, db_session: AsyncSession, crud) -> dict:
+    cache_key = (token_digest(token), token_type)
+    cached = token_cache.get(cache_key)
+    if cached is not None:
+        payload, session_id, issued_at, jti = cached
+        if await is_session_revoked(db_session, crud, session_id, issued_at, jti):
+            token_cache.pop(cache_key)
+            raise UnauthorizedException(detail="Session revoked")
+        return dict(payload)
     try:
-        payload = jwt.decode(token, settings.PEM_PUBLIC_KEY,
-                             algorithms=["RS256"], options={"verify_exp": True})
+        payload = keyring.verify(token, options={"verify_exp": True})
         logger.info(f'jwt payload: {payload}')
         if payload['type'] not in ["access", "refresh"]:
             raise UnauthorizedException(detail="Invalid token type")
-        payload = json.loads(payload['sub'])
+        expires_at = payload['exp']
+        issued_at = payload.get('iat', 0)
+        session_id = payload.get('sid')
+        jti = payload.get('jti')
+        payload = token_payload(payload)
         if token_type == "access":
-            if not set(["user_id", "roles", "teams", "visibility_group"]).issubset(payload.keys()):
-                raise UnauthorizedException(detail="Invalid token payload")
-            if not isinstance(payload['roles'], dict):
-                raise UnauthorizedException(detail="Invalid token payload roles")
-            if not await crud.sessions.get_by_access_token(db_session, access_token=token):
+            check_access_payload(payload)
+            if await is_session_revoked(db_session, crud, session_id, issued_at, jti):
+                raise UnauthorizedException(detail="Session revoked")
+            elif not session_id and not await crud.sessions.get_by_access_token(db_session, access_token=token):
                 raise UnauthorizedException(detail="Access token not found")
-            return payload
         elif token_type == "refresh":
             if not set(["user_id"]).issubset(payload.keys()):
                 raise UnauthorizedException(detail="Invalid token payload")
-            if not await crud.sessions.get_by_refresh_token(db_session, refresh_token=token):
+            if not await crud.sessions.get_by_refresh_token(db_session, refresh_token=token, session_id=session_id):
                 raise UnauthorizedException(detail="Refresh token not found")
-            return payload
-    except jwt.ExpiredSignatureError:
-        raise UnauthorizedException(detail="Token expired")
-    except UnauthorizedException:
-        raise
+            # refresh tokens outlive access token revocations, they are only dropped with the session
+            session_id = None
+        else:
+            raise UnauthorizedException(detail="Invalid token type")
+        token_cache.set(cache_key, (payload, session_id, issued_at, jti), expires_at=expires_at)
+        return dict(payload)
     except Exception as e:
-        raise UnauthorizedException(detail=f"Invalid token: {e}")
+        raise token_error(e)
+
+
+def decode_jwt_tokens(tokens: List[str]) -> List[Union[dict, Exception]]:
+    """verified claims of every token, the error takes the place of an invalid one"""
+    results = []
+    for token in tokens:
+        try:
+            results.append(keyring.verify(token, options={"verify_exp": True}))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+async def verify_jwt_tokens(
+    tokens: List[str], db_session: AsyncSession, crud
+) -> List[Union[dict, UnauthorizedException]]:
+    """
+    `verify_jwt_token` for many access tokens, payload or error per token in the same order.
+    Signatures of uncached tokens are verified in one crypto executor call. Tokens with a session id are checked
+    against the session revocation index, like `verify_jwt_token`; the sessions of tokens without one
+    are fetched with one `IN` query on the token digests.
+    """
+    digests = [token_digest(i) for i in tokens]
+    results: List[Union[dict, UnauthorizedException, None]] = [None] * len(tokens)
+    pending = []
+    for n, digest in enumerate(digests):
+        cached = token_cache.get((digest, "access"))
+        if cached is None:
+            pending.append(n)
+            continue
+        payload, session_id, issued_at, jti = cached
+        if await is_session_revoked(db_session, crud, session_id, issued_at, jti):
+            token_cache.pop((digest, "access"))
+            results[n] = UnauthorizedException(detail="Session revoked")
+        else:
+            results[n] = dict(payload)
+    if not pending:
+        return results
+    claims = await crypto_executor.run(decode_jwt_tokens, [tokens[n] for n in pending])
+    # one result per pending token, in the same order
+    decoded = list(zip(pending, claims, strict=True))
+    sessions = await crud.sessions.get_by_access_token_digests(
+        db_session, digests=[digests[n] for n, i in decoded if isinstance(i, dict) and not i.get('sid')])
+    # refreshing or removing a session replaces or drops its access token digest
+    known_digests = {i.access_token_digest for i in sessions}
+    for n, i in decoded:
+        try:
+            if isinstance(i, Exception):
+                raise i
+            if i['type'] != "access":
+                raise UnauthorizedException(detail="Invalid token type")
+            payload = check_access_payload(token_payload(i))
+            if await is_session_revoked(db_session, crud, i.get('sid'), i.get('iat', 0), i.get('jti')):
+                raise UnauthorizedException(detail="Session revoked")
+            elif not i.get('sid') and digests[n] not in known_digests:
+                raise UnauthorizedException(detail="Access token not found")
+            token_cache.set(
+                (digests[n], "access"), (payload, i.get('sid'), i.get('iat', 0), i.get('jti')), expires_at=i['exp'])
+            results[n] = dict(payload)
+        except Exception as e:
+            results[n] = token_error(e)
+    return results
 
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        return await crypto_executor.run(pwd_context.verify, plain_password, hashed_password)
     except Exception as e:
         logger.error(e)
         return False
 
 
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify the password, a new hash is returned when the stored one uses an outdated scheme or cost"""
+    try:
+        return await crypto_executor.run(pwd_context.verify_and_update, plain_password, hashed_password)
+    except Exception as e:
+        logger.error(e)
+        return False, None
+
+
+async def configure_password_hashing() -> None:
+    """
+    set the hash cost to meet PASSWORD_HASH_TARGET_MS on this machine,
+    stored hashes of a lower cost are rehashed on the next login
+    """
+    scheme = settings.PASSWORD_HASH_SCHEME
+    if not pwd_context.handler(scheme).has_backend():
+        raise RuntimeError(f"No backend for the {scheme} password hash scheme, install argon2-cffi")
+    if not settings.PASSWORD_HASH_TARGET_MS:
+        return
+    cost = await crypto_executor.run(calibrate_cost, pwd_context, scheme, settings.PASSWORD_HASH_TARGET_MS)
+    pwd_context.update(**{f"{scheme}__default_rounds": cost, f"{scheme}__min_rounds": cost})
+    logger.info(f"Password hashing: {scheme}, cost {cost} for {settings.PASSWORD_HASH_TARGET_MS} ms")
+
+
 def create_password():
     return ''.join(random.choice(string.ascii_letters) for i in range(15))
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    return await crypto_executor.run(pwd_context.hash, password)
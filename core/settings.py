@@ -1,6 +1,5 @@
 # # Native # #
 import os
-import json
 from typing import Literal, Optional
 
 # # Installed # #
@@ -12,14 +11,13 @@ from pydantic import (
     BaseModel,
     HttpUrl,
     PostgresDsn,
-    root_validator,
+    conint,
 )
 
 # # Package # #
 from core.aws import get_secret as get_secret_aws
 from core.yc import get_secret as get_secret_yc
 from core.yc import YCAuthMethod # noqa
-from core.utils import jwk2pem
 from core.logger import logger
 
 __all__ = ("settings", "Params", "Page")
@@ -48,15 +46,28 @@ class SecretsSchema(BaseModel):
     FACEBOOK_CLIENT_SECRET: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_MINUTES: int
+    # conint, not Literal[1, 2]: the environment and the secret stores hold strings
+    ACCESS_TOKEN_CLAIMS_VERSION: conint(ge=1, le=2) = 1
     JWK: str
+    JWK_ACTIVE_KID: Optional[str] = None
+    JWT_ALGORITHM: Optional[Literal["RS256", "ES256", "EdDSA"]] = None
+    JWKS_MAX_AGE: int = 300
+    JWK_RELOAD_SECONDS: Optional[int] = None
+    CRYPTO_EXECUTOR_WORKERS: Optional[int] = None
+    COOKIE_SECRET: Optional[str] = None
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "argon2"] = "bcrypt"
+    PASSWORD_HASH_TARGET_MS: Optional[int] = None
+    LOGIN_RATE_LIMIT_BACKEND: Literal["memory", "database"] = "memory"
+    LOGIN_RATE_LIMIT_EMAIL: int = 5
+    LOGIN_RATE_LIMIT_IP: int = 30
     ENVIRONMENT: Literal["development", "staging", "production"]
-
-    @root_validator
-    def extract_jwk(cls, values):
-        keys = jwk2pem(json.loads(values["JWK"]))
-        values["PEM_PUBLIC_KEY"] = keys["PEM_PUBLIC_KEY"]
-        values["PEM_PRIVATE_KEY"] = keys["PEM_PRIVATE_KEY"]
-        return values
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: int = 30
+    SESSION_REVOCATION_SYNC_SECONDS: int = 5
+    POLICY_MAX_STALE_SECONDS: int = 300
+    RBAC_DECISION_CACHE_SIZE: int = 10000
+    POLICY_BUNDLE_PATH: Optional[str] = None
+    VISIBILITY_GROUP_RESOLVER: Literal["memory", "sql"] = "memory"
 
 
 class Settings(BaseSettings):
@@ -75,7 +86,8 @@ class Settings(BaseSettings):
         super().__init__(*args, **kwargs)
 
         # serverless read from environment
-        if set(SecretsSchema.__fields__.keys()).issubset(dict(os.environ).keys()):
+        required_secrets = {k for k, v in SecretsSchema.__fields__.items() if v.required}
+        if required_secrets.issubset(dict(os.environ).keys()):
             secrets = dict(os.environ)
 
         elif self.AWS_SECRET_ARN:
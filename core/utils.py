@@ -3,11 +3,10 @@ import os
 import six
 import enum
 import json
-import struct
 import base64
 import traceback
 from uuid import UUID
-from typing import List, Type, Union, Dict, Any
+from typing import List, Optional, Type, Union, Dict, Any
 
 # # Installed # #
 from sqlmodel import SQLModel
@@ -19,6 +18,12 @@ from cryptography.hazmat.primitives.asymmetric.rsa import (
     rsa_crt_dmp1,
     rsa_crt_dmq1
 )
+from cryptography.hazmat.primitives.asymmetric.ec import (
+    EllipticCurvePublicNumbers,
+    SECP256R1,
+    derive_private_key,
+)
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.serialization import NoEncryption
@@ -31,7 +36,9 @@ from core.exceptions import NotFoundException, BadRequestException
 __all__ = (
     "lambda_request",
     "is_valid_uuid",
+    "etag_matches",
     "jwk2pem",
+    "jwk2key",
     "ColumnAnnotation",
     "ApiListUtils",
 )
@@ -180,39 +187,90 @@ def is_valid_uuid(uuid_to_test, version=4):
     return str(uuid_obj) == uuid_to_test
 
 
-def jwk2pem(jwk):
-    def intarr2long(arr):
-        return int(''.join(["%02x" % byte for byte in arr]), 16)
-
-    def base64_to_long(data):
-        if isinstance(data, six.text_type):
-            data = data.encode("ascii")
-        # urlsafe_b64decode will happily convert b64encoded data
-        _d = base64.urlsafe_b64decode(bytes(data) + b'==')
-        return intarr2long(struct.unpack('%sB' % len(_d), _d))
-
-    e = base64_to_long(jwk['e'])
-    n = base64_to_long(jwk['n'])
-    p = base64_to_long(jwk['p'])
-    q = base64_to_long(jwk['q'])
-    d = base64_to_long(jwk['d'])
-    dmp1 = rsa_crt_dmp1(d, p)
-    dmq1 = rsa_crt_dmq1(d, q)
-    iqmp = rsa_crt_iqmp(p, q)
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    whether an If-None-Match header value lists `etag` (weak comparison) or is `*`,
+    the response is then a 304 Not Modified
+    """
+    if not if_none_match:
+        return False
+    tags = [i.strip().removeprefix("W/") for i in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags or "*" in tags
+
 
+def base64url_to_int(data: Union[str, bytes]) -> int:
+    if isinstance(data, six.text_type):
+        data = data.encode("ascii")
+    # urlsafe_b64decode will happily convert b64encoded data
+    return int.from_bytes(base64.urlsafe_b64decode(bytes(data) + b'=='), "big")
+
+
+def base64url_to_bytes(data: Union[str, bytes]) -> bytes:
+    if isinstance(data, six.text_type):
+        data = data.encode("ascii")
+    return base64.urlsafe_b64decode(bytes(data) + b'==')
+
+
+def jwk2key(jwk: dict) -> dict:
+    """
+    build cryptography key objects from a RSA, EC (P-256) or OKP (Ed25519) JWK,
+    the public key only if the JWK has no private part
+    """
+    if jwk.get('kty') == 'EC':
+        return ec_jwk2key(jwk)
+    if jwk.get('kty') == 'OKP':
+        return okp_jwk2key(jwk)
+
+    e = base64url_to_int(jwk['e'])
+    n = base64url_to_int(jwk['n'])
     public_numbers = RSAPublicNumbers(e, n)
+    public_key = public_numbers.public_key(backend=default_backend())
+    if 'd' not in jwk:
+        return {"PUBLIC_KEY": public_key, "PRIVATE_KEY": None}
+
+    p = base64url_to_int(jwk['p'])
+    q = base64url_to_int(jwk['q'])
+    d = base64url_to_int(jwk['d'])
+    dmp1 = base64url_to_int(jwk['dp']) if jwk.get('dp') else rsa_crt_dmp1(d, p)
+    dmq1 = base64url_to_int(jwk['dq']) if jwk.get('dq') else rsa_crt_dmq1(d, q)
+    iqmp = base64url_to_int(jwk['qi']) if jwk.get('qi') else rsa_crt_iqmp(p, q)
     private_numbers = RSAPrivateNumbers(
         p, q, d, dmp1, dmq1, iqmp, public_numbers)
+    private_key = private_numbers.private_key(backend=default_backend())
+    return {"PUBLIC_KEY": public_key, "PRIVATE_KEY": private_key}
+
 
+def ec_jwk2key(jwk: dict) -> dict:
+    if jwk.get('crv') != 'P-256':
+        raise ValueError(f"Unsupported EC curve: {jwk.get('crv')}")
+    public_numbers = EllipticCurvePublicNumbers(
+        base64url_to_int(jwk['x']), base64url_to_int(jwk['y']), SECP256R1())
     public_key = public_numbers.public_key(backend=default_backend())
-    private_key = private_numbers.private_key(backend=default_backend())
+    if 'd' not in jwk:
+        return {"PUBLIC_KEY": public_key, "PRIVATE_KEY": None}
+    private_key = derive_private_key(base64url_to_int(jwk['d']), SECP256R1(), default_backend())
+    return {"PUBLIC_KEY": public_key, "PRIVATE_KEY": private_key}
+
+
+def okp_jwk2key(jwk: dict) -> dict:
+    if jwk.get('crv') != 'Ed25519':
+        raise ValueError(f"Unsupported OKP curve: {jwk.get('crv')}")
+    public_key = Ed25519PublicKey.from_public_bytes(base64url_to_bytes(jwk['x']))
+    if 'd' not in jwk:
+        return {"PUBLIC_KEY": public_key, "PRIVATE_KEY": None}
+    private_key = Ed25519PrivateKey.from_private_bytes(base64url_to_bytes(jwk['d']))
+    return {"PUBLIC_KEY": public_key, "PRIVATE_KEY": private_key}
+
+
+def jwk2pem(jwk):
+    keys = jwk2key(jwk)
 
-    pem_public_key = public_key.public_bytes(
+    pem_public_key = keys["PUBLIC_KEY"].public_bytes(
         encoding=serialization.Encoding.PEM,
         format=serialization.PublicFormat.SubjectPublicKeyInfo
     )
 
-    pem_private_key = private_key.private_bytes(
+    pem_private_key = keys["PRIVATE_KEY"].private_bytes(
         encoding=serialization.Encoding.PEM,
         format=serialization.PrivateFormat.PKCS8,
         encryption_algorithm=NoEncryption()
@@ -0,0 +1,36 @@
+"""session_revocation
+
+Revision ID: 5b1f0c7e2a91
+Revises: 627f75ac5c76
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlmodel
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1f0c7e2a91'
+down_revision = '627f75ac5c76'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('session_revocation',
+    sa.Column('session_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('revoked_before', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('session_id'),
+    schema='auth',
+    comment='Session Revocation'
+    )
+    op.create_index(op.f('ix_auth_session_revocation_expires_at'), 'session_revocation', ['expires_at'],
+                    unique=False, schema='auth')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_auth_session_revocation_expires_at'), table_name='session_revocation', schema='auth')
+    op.drop_table('session_revocation', schema='auth')
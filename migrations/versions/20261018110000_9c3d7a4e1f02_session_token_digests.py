@@ -0,0 +1,57 @@
+"""session_token_digests
+
+Replace the stored access/refresh tokens with their SHA-256 digests.
+Downgrade can not restore the tokens, existing sessions are dropped.
+
+Revision ID: 9c3d7a4e1f02
+Revises: 5b1f0c7e2a91
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlmodel
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3d7a4e1f02'
+down_revision = '5b1f0c7e2a91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('sessions', sa.Column('access_token_digest', sa.String(length=64), nullable=True), schema='auth')
+    op.add_column('sessions', sa.Column('refresh_token_digest', sa.String(length=64), nullable=True), schema='auth')
+    op.execute("""
+        UPDATE auth.sessions
+        SET access_token_digest = encode(sha256(convert_to(access_token, 'UTF8')), 'hex'),
+            refresh_token_digest = encode(sha256(convert_to(refresh_token, 'UTF8')), 'hex')
+    """)
+    # tokens issued within the same second for the same user used to be identical
+    op.execute("""
+        DELETE FROM auth.sessions a
+        USING auth.sessions b
+        WHERE a.ctid < b.ctid
+          AND (a.access_token_digest = b.access_token_digest OR a.refresh_token_digest = b.refresh_token_digest)
+    """)
+    op.alter_column('sessions', 'access_token_digest', nullable=False, schema='auth')
+    op.alter_column('sessions', 'refresh_token_digest', nullable=False, schema='auth')
+    op.create_index(op.f('ix_auth_sessions_access_token_digest'), 'sessions', ['access_token_digest'],
+                    unique=True, schema='auth')
+    op.create_index(op.f('ix_auth_sessions_refresh_token_digest'), 'sessions', ['refresh_token_digest'],
+                    unique=True, schema='auth')
+    op.drop_column('sessions', 'access_token', schema='auth')
+    op.drop_column('sessions', 'refresh_token', schema='auth')
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM auth.sessions')
+    op.add_column('sessions', sa.Column('refresh_token', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+                  schema='auth')
+    op.add_column('sessions', sa.Column('access_token', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+                  schema='auth')
+    op.drop_index(op.f('ix_auth_sessions_refresh_token_digest'), table_name='sessions', schema='auth')
+    op.drop_index(op.f('ix_auth_sessions_access_token_digest'), table_name='sessions', schema='auth')
+    op.drop_column('sessions', 'refresh_token_digest', schema='auth')
+    op.drop_column('sessions', 'access_token_digest', schema='auth')
@@ -0,0 +1,32 @@
+"""session_cookie_index
+
+Sessions keep the id part of the signed `auth` cookie, indexed for logout and re-login lookups.
+bcrypt-hashed cookies of existing sessions are replaced with random ids,
+the signed cookie is reissued on the next token refresh.
+
+Revision ID: d2e8b4c61a37
+Revises: 9c3d7a4e1f02
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e8b4c61a37'
+down_revision = '9c3d7a4e1f02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        UPDATE auth.sessions
+        SET cookie = md5(random()::text || id::text) || md5(random()::text || clock_timestamp()::text)
+        WHERE cookie LIKE '$2%'
+    """)
+    op.create_index(op.f('ix_auth_sessions_cookie'), 'sessions', ['cookie'], unique=False, schema='auth')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_auth_sessions_cookie'), table_name='sessions', schema='auth')
@@ -0,0 +1,35 @@
+"""login_rate_limit
+
+Revision ID: 7a4c19e5b3d8
+Revises: d2e8b4c61a37
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlmodel
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4c19e5b3d8'
+down_revision = 'd2e8b4c61a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('login_rate_limit',
+    sa.Column('key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('key'),
+    schema='auth',
+    comment='Login Rate Limit'
+    )
+    op.create_index(op.f('ix_auth_login_rate_limit_updated_at'), 'login_rate_limit', ['updated_at'],
+                    unique=False, schema='auth')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_auth_login_rate_limit_updated_at'), table_name='login_rate_limit', schema='auth')
+    op.drop_table('login_rate_limit', schema='auth')
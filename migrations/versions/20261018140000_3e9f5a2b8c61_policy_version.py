@@ -0,0 +1,55 @@
+"""policy_version
+
+Change counters of the cached policies, the `rbac` counter is bumped by statement triggers
+on auth.role, auth.resource and auth.permission.
+
+Revision ID: 3e9f5a2b8c61
+Revises: 7a4c19e5b3d8
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlmodel
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9f5a2b8c61'
+down_revision = '7a4c19e5b3d8'
+branch_labels = None
+depends_on = None
+
+RBAC_TABLES = ('role', 'resource', 'permission')
+
+
+def upgrade() -> None:
+    op.create_table('policy_version',
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('name'),
+    schema='auth',
+    comment='Policy Version'
+    )
+    op.execute("INSERT INTO auth.policy_version (name, version) VALUES ('rbac', 1)")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION auth.bump_policy_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE auth.policy_version SET version = version + 1, updated_at = now() WHERE name = TG_ARGV[0];
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in RBAC_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_rbac_policy_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON auth.{table}
+            FOR EACH STATEMENT EXECUTE PROCEDURE auth.bump_policy_version('rbac')
+        """)
+
+
+def downgrade() -> None:
+    for table in RBAC_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_rbac_policy_version ON auth.{table}")
+    op.execute("DROP FUNCTION IF EXISTS auth.bump_policy_version()")
+    op.drop_table('policy_version', schema='auth')
@@ -0,0 +1,43 @@
+"""visibility_policy_version
+
+`visibility` change counter, bumped by statement triggers on auth.visibility_group
+and on the auth.user columns the visibility settings are built from.
+
+Revision ID: b71d3c9e4f20
+Revises: 3e9f5a2b8c61
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71d3c9e4f20'
+down_revision = '3e9f5a2b8c61'
+branch_labels = None
+depends_on = None
+
+TRIGGERS = {
+    'visibility_group_visibility_policy_version': (
+        'INSERT OR UPDATE OR DELETE OR TRUNCATE', 'auth.visibility_group'),
+    'user_members_visibility_policy_version': (
+        'INSERT OR DELETE OR TRUNCATE', 'auth."user"'),
+    'user_settings_visibility_policy_version': (
+        'UPDATE OF visibility_group_id, email', 'auth."user"'),
+}
+
+
+def upgrade() -> None:
+    op.execute("INSERT INTO auth.policy_version (name, version) VALUES ('visibility', 1) ON CONFLICT DO NOTHING")
+    for name, (events, table) in TRIGGERS.items():
+        op.execute(f"""
+            CREATE TRIGGER {name}
+            AFTER {events} ON {table}
+            FOR EACH STATEMENT EXECUTE PROCEDURE auth.bump_policy_version('visibility')
+        """)
+
+
+def downgrade() -> None:
+    for name, (_, table) in TRIGGERS.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+    op.execute("DELETE FROM auth.policy_version WHERE name = 'visibility'")
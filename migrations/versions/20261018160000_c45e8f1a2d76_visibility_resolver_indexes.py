@@ -0,0 +1,34 @@
+"""visibility_resolver_indexes
+
+Indexes of the SQL visibility resolver: descendant groups by `prefix LIKE '<prefix>/%'`
+and members by visibility group (declared on the model, missing from the initial migration).
+
+Revision ID: c45e8f1a2d76
+Revises: b71d3c9e4f20
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c45e8f1a2d76'
+down_revision = 'b71d3c9e4f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_auth_visibility_group_prefix_pattern "
+        "ON auth.visibility_group (prefix text_pattern_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_auth_user_visibility_group_id "
+        "ON auth.\"user\" (visibility_group_id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS auth.ix_auth_user_visibility_group_id")
+    op.execute("DROP INDEX IF EXISTS auth.ix_auth_visibility_group_prefix_pattern")
@@ -0,0 +1,49 @@
+"""session_revocation_on_delete
+
+`current_jti` of the session revocations, and a row trigger on auth.sessions revoking the tokens
+of every deleted session, whichever path deletes it (API, admin, cascade).
+
+Revision ID: d2a7e4b9c013
+Revises: c45e8f1a2d76
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlmodel
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7e4b9c013'
+down_revision = 'c45e8f1a2d76'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('session_revocation', sa.Column('current_jti', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+                  schema='auth')
+    op.execute("""
+        CREATE OR REPLACE FUNCTION auth.revoke_deleted_session() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO auth.session_revocation (session_id, revoked_before, expires_at, current_jti)
+            VALUES (OLD.id, floor(extract(epoch FROM clock_timestamp()))::int + 1, OLD.expires_at, NULL)
+            ON CONFLICT (session_id) DO UPDATE SET
+                revoked_before = GREATEST(auth.session_revocation.revoked_before, EXCLUDED.revoked_before),
+                expires_at = GREATEST(auth.session_revocation.expires_at, EXCLUDED.expires_at),
+                current_jti = NULL;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER sessions_revoke_deleted
+        AFTER DELETE ON auth.sessions
+        FOR EACH ROW EXECUTE PROCEDURE auth.revoke_deleted_session()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS sessions_revoke_deleted ON auth.sessions")
+    op.execute("DROP FUNCTION IF EXISTS auth.revoke_deleted_session()")
+    op.drop_column('session_revocation', 'current_jti', schema='auth')
@@ -1,7 +1,10 @@
 import json
+import uuid
 import pytest
 from datetime import datetime
 
+from core.ratelimit import login_limiter, MemoryBackend
+
 hostname = "hostname"
 
 
@@ -23,6 +26,19 @@ class Test:
             pytest.test_token = response.json()["data"]["access_token"]
             pytest.expires_at = response.json()["data"]["expires_at"]
 
+    @pytest.mark.asyncio
+    async def test_basic_rate_limited(self, test_client, monkeypatch):
+        # a fresh in-process bucket of 2 attempts per email, whatever the configured backend and limits
+        monkeypatch.setattr(login_limiter, "backend", MemoryBackend())
+        monkeypatch.setattr(login_limiter, "limits", {"ip": 0, "email": 2})
+        form = {"username": f"rate-limit-{uuid.uuid4().hex}@{hostname}.com", "password": "wrong"}
+        for _ in range(2):
+            response = test_client.post(f"{self.url}/basic", data=form)
+            assert response.status_code != 429
+        response = test_client.post(f"{self.url}/basic", data=form)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) > 0
+
     @pytest.mark.asyncio
     async def test_refresh(self, test_client):
         response = test_client.post(
@@ -32,6 +48,26 @@ class Test:
         assert response.status_code == 201
         pytest.test_token = response.json()["data"]["access_token"]
 
+    @pytest.mark.asyncio
+    async def test_verify_batch(self, test_client):
+        response = test_client.post(
+            f"{self.url}/verify/batch",
+            data=json.dumps({"tokens": [pytest.test_token, "invalid"]}),
+            headers={"Authorization": f"Bearer {pytest.test_token}"},
+        )
+        assert response.status_code == 200
+        valid, invalid = response.json()["data"]
+        assert valid["valid"] and valid["claims"]["email"] == pytest.test_username
+        assert not invalid["valid"] and invalid["detail"]
+
+    @pytest.mark.asyncio
+    async def test_verify_batch_unauthenticated(self, test_client):
+        response = test_client.post(
+            f"{self.url}/verify/batch",
+            data=json.dumps({"tokens": [pytest.test_token]}),
+        )
+        assert response.status_code == 401
+
     @pytest.mark.asyncio
     async def test_google(self, test_client):
         response = test_client.get(
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+from app.rbac.util import RBAC, RBACSnapshot, DecisionCache, decision_cache
+
+REQUEST = SimpleNamespace(method="GET", endpoint="/api/report")
+
+
+def snapshot(version, roles=("manager",)) -> RBACSnapshot:
+    """rules with one RBAC enabled resource, allowed to `roles`"""
+    return RBACSnapshot({
+        "resources": {"report": {
+            "endpoint": "/api/report", "method": "GET", "rbac_enable": True, "visibility_group_enable": False}},
+        "permissions": {f"{i}-report": {"id": f"{i}-report", "role_id": i, "resource_id": "report"} for i in roles},
+    }, version=version)
+
+
+class TestDecisionCache:
+
+    def test_version_change(self):
+        decision_cache.cache.clear()
+        rbac = RBAC()
+        assert rbac.decide(snapshot(1), REQUEST, ["manager"])["access"]
+        # the permission is gone in version 2, the version 1 decision is not reused
+        assert not rbac.decide(snapshot(2, roles=()), REQUEST, ["manager"])["access"]
+        assert rbac.decide(snapshot(1), REQUEST, ["manager"])["access"]
+
+    def test_alternating_versions_keep_their_entries(self):
+        cache = DecisionCache(maxsize=100)
+        old, new = snapshot(1), snapshot(2)
+        cache.set(old, ("key",), {"access": True})
+        cache.set(new, ("key",), {"access": False})
+        for _ in range(3):
+            assert cache.get(old, ("key",)) == {"access": True}
+            assert cache.get(new, ("key",)) == {"access": False}
+        assert cache.stats()["hits"] == 6 and cache.stats()["size"] == 2
+
+    def test_memoized_per_role_set(self):
+        decision_cache.cache.clear()
+        rbac, rules = RBAC(), snapshot(3)
+        hits = decision_cache.stats()["hits"]
+        assert rbac.decide(rules, REQUEST, ["manager", "user"])["access"]
+        assert rbac.decide(rules, REQUEST, ["user", "manager"])["access"]
+        assert not rbac.decide(rules, REQUEST, ["user"])["access"]
+        assert decision_cache.stats()["hits"] == hits + 1
+
+    def test_not_cached(self):
+        cache = DecisionCache(maxsize=100)
+        cache.set(snapshot(None), ("key",), {"access": True})
+        assert cache.get(snapshot(None), ("key",)) is None
+        disabled = DecisionCache(maxsize=0)
+        disabled.set(snapshot(1), ("key",), {"access": True})
+        assert disabled.get(snapshot(1), ("key",)) is None
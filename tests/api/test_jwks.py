@@ -0,0 +1,33 @@
+import pytest
+
+from core.utils import etag_matches
+
+
+@pytest.mark.usefixtures("test_client")
+class Test:
+    url = "/.well-known/jwks.json"
+
+    @pytest.mark.asyncio
+    async def test_get(self, test_client):
+        response = test_client.get(self.url)
+        assert response.status_code == 200
+        assert response.json()["keys"]
+        assert all("kid" in i for i in response.json()["keys"])
+        assert response.headers["cache-control"].startswith("public")
+        pytest.test_jwks_etag = response.headers["etag"]
+
+    @pytest.mark.asyncio
+    async def test_not_modified(self, test_client):
+        response = test_client.get(self.url, headers={"If-None-Match": pytest.test_jwks_etag})
+        assert response.status_code == 304
+
+
+class TestEtagMatches:
+
+    @pytest.mark.parametrize("if_none_match", ['"abc"', 'W/"abc"', '"old", "abc"', '"old",W/"abc"', "*"])
+    def test_match(self, if_none_match):
+        assert etag_matches(if_none_match, '"abc"')
+
+    @pytest.mark.parametrize("if_none_match", [None, "", '"old"', "abc", '"abcd"'])
+    def test_no_match(self, if_none_match):
+        assert not etag_matches(if_none_match, '"abc"')
@@ -0,0 +1,22 @@
+import pytest
+
+from app.policy.bundle import verify_bundle
+from core.security import keyring
+
+
+@pytest.mark.usefixtures("test_client")
+class Test:
+    url = "api/auth/v1/policy/bundle"
+
+    @pytest.mark.asyncio
+    async def test_get(self, test_client):
+        response = test_client.get(self.url)
+        assert response.status_code == 200
+        bundle = verify_bundle(response.json(), keyring)
+        assert {"rbac", "visibility_group"} <= bundle.keys()
+        pytest.test_policy_etag = response.headers["etag"]
+
+    @pytest.mark.asyncio
+    async def test_not_modified(self, test_client):
+        response = test_client.get(self.url, headers={"If-None-Match": pytest.test_policy_etag})
+        assert response.status_code == 304
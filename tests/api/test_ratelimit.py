@@ -0,0 +1,73 @@
+import pytest
+
+from core import ratelimit
+from core.exceptions import TooManyRequestsException
+from core.ratelimit import MemoryBackend, RateLimiter, RATE_LIMIT_WINDOW
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "time", clock)
+    return clock
+
+
+class TestMemoryBackend:
+
+    @pytest.mark.asyncio
+    async def test_exhaustion(self, clock):
+        backend = MemoryBackend()
+        # 3 attempts per window: one token every 20 seconds
+        assert [await backend.acquire("email:a", 3, 3 / RATE_LIMIT_WINDOW) for _ in range(3)] == [0, 0, 0]
+        assert await backend.acquire("email:a", 3, 3 / RATE_LIMIT_WINDOW) == pytest.approx(20)
+        clock.now += 5
+        assert await backend.acquire("email:a", 3, 3 / RATE_LIMIT_WINDOW) == pytest.approx(15)
+        # other keys have their own bucket
+        assert await backend.acquire("email:b", 3, 3 / RATE_LIMIT_WINDOW) == 0
+
+    @pytest.mark.asyncio
+    async def test_refill(self, clock):
+        backend = MemoryBackend()
+        for _ in range(3):
+            await backend.acquire("ip:a", 3, 3 / RATE_LIMIT_WINDOW)
+        clock.now += 20
+        assert await backend.acquire("ip:a", 3, 3 / RATE_LIMIT_WINDOW) == 0
+        assert await backend.acquire("ip:a", 3, 3 / RATE_LIMIT_WINDOW) > 0
+        # a full window refills the bucket, never above its capacity
+        clock.now += 10 * RATE_LIMIT_WINDOW
+        assert [await backend.acquire("ip:a", 3, 3 / RATE_LIMIT_WINDOW) for _ in range(3)] == [0, 0, 0]
+        assert await backend.acquire("ip:a", 3, 3 / RATE_LIMIT_WINDOW) > 0
+
+    @pytest.mark.asyncio
+    async def test_rejected_attempts_take_no_token(self, clock):
+        backend = MemoryBackend()
+        await backend.acquire("ip:a", 1, 1 / RATE_LIMIT_WINDOW)
+        for _ in range(5):
+            clock.now += 10
+            await backend.acquire("ip:a", 1, 1 / RATE_LIMIT_WINDOW)
+        clock.now += 10
+        assert await backend.acquire("ip:a", 1, 1 / RATE_LIMIT_WINDOW) == 0
+
+
+class TestRateLimiter:
+
+    @pytest.mark.asyncio
+    async def test_check(self, clock):
+        limiter = RateLimiter(MemoryBackend(), {"ip": 0, "email": 2})
+        for _ in range(2):
+            await limiter.check(ip="127.0.0.1", email="a@hostname.com")
+        with pytest.raises(TooManyRequestsException) as e:
+            await limiter.check(ip="127.0.0.1", email="a@hostname.com")
+        assert e.value.status_code == 429
+        assert e.value.headers == {"Retry-After": "30"}
+        assert limiter.stats()["allowed"] == 2 and limiter.stats()["rejected"] == {"email": 1}
+        # a disabled kind and a missing value are not limited
+        await limiter.check(ip="127.0.0.1", email=None)
@@ -1,6 +1,11 @@
 import json
+import uuid
 import pytest
 
+from app.rbac.schema import IRBACValidate
+from app.rbac.util import RBAC, RBACSnapshot
+from core.database.session import get_session
+
 
 @pytest.mark.usefixtures("test_client")
 class Test:
@@ -23,3 +28,108 @@ class Test:
                 {"method": "get", "endpoint": "/api/auth/v1/test"}),
         )
         assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_validate_batch(self, test_client):
+        items = [
+            {"method": "get", "endpoint": "/api/auth/v1/test"},
+            {"method": "post", "endpoint": "/api/auth/v1/test"},
+        ]
+        response = test_client.post(
+            f"{self.url}/validate/batch",
+            headers={"Authorization": f"Bearer {pytest.test_token}"},
+            data=json.dumps({"items": items}),
+        )
+        assert response.status_code == 200
+        assert len(response.json()["data"]) == len(items)
+
+    @pytest.mark.asyncio
+    async def test_validate_batch_matches_validate(self, test_client):
+        """a mixed batch gets, item by item, the decision of /rbac/validate"""
+        headers = {"Authorization": f"Bearer {pytest.test_token}"}
+        endpoint = f"/api/auth/v1/rbac-batch-{uuid.uuid4().hex}"
+        # rbac enabled and no permission: denied to everyone
+        response = test_client.post(
+            "api/auth/v1/resource",
+            headers=headers,
+            data=json.dumps({
+                "endpoint": endpoint,
+                "method": "get",
+                "description": "rbac batch test",
+                "rbac_enable": True,
+                "visibility_group_enable": False
+            }))
+        assert response.status_code == 200
+        resource_id = response.json()["data"]["id"]
+
+        async def reload():
+            rbac = test_client.app.rbac
+            async for db_session in get_session():
+                rbac.refresher.set(await rbac.update(db_session))
+
+        try:
+            test_client.portal.call(reload)
+            items = [
+                {"method": "get", "endpoint": endpoint},
+                {"method": "get", "endpoint": f"/api/auth/v1/rbac-batch-{uuid.uuid4().hex}"},
+                {"method": "post", "endpoint": endpoint},
+                {"method": "get", "endpoint": endpoint},
+            ]
+            response = test_client.post(
+                f"{self.url}/validate/batch", headers=headers, data=json.dumps({"items": items}))
+            assert response.status_code == 200
+            batch = response.json()["data"]
+            assert [i["access"] for i in batch] == [False, True, True, False]
+            for item, decision in zip(items, batch, strict=True):
+                response = test_client.post(f"{self.url}/validate", headers=headers, data=json.dumps(item))
+                assert response.status_code == 200
+                assert response.json()["data"] == decision
+        finally:
+            test_client.delete(f"api/auth/v1/resource/{resource_id}", headers=headers)
+
+
+class TestValidateBatch:
+    """RBAC.validate_batch against RBAC.validate on fixed rules, without the database"""
+
+    rules = RBACSnapshot({
+        "resources": {
+            "report": {"endpoint": "/api/report", "method": "get", "rbac_enable": True,
+                       "visibility_group_enable": False},
+            "export": {"endpoint": "/api/report/$uuid$/export", "method": "get", "rbac_enable": True,
+                       "visibility_group_enable": True},
+            "public": {"endpoint": "/api/public", "method": "get", "rbac_enable": False,
+                       "visibility_group_enable": False},
+        },
+        "permissions": {
+            "manager-report": {"id": "manager-report", "role_id": "manager", "resource_id": "report"},
+            "admin-export": {"id": "admin-export", "role_id": "admin", "resource_id": "export"},
+        },
+    }, version=None)
+    items = [
+        {"method": "get", "endpoint": "/api/report"},
+        {"method": "get", "endpoint": "/api/report/5f0c0a3e/export"},
+        {"method": "get", "endpoint": "/api/public"},
+        {"method": "get", "endpoint": "/api/unknown"},
+        {"method": "post", "endpoint": "/api/report"},
+    ]
+
+    def rbac(self) -> RBAC:
+        rbac = RBAC()
+        rbac.refresher.set(self.rules)
+        return rbac
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("roles, access", [
+        (["manager"], [True, False, True, True, True]),
+        (["admin"], [False, True, True, True, True]),
+        (["manager", "admin"], [True, True, True, True, True]),
+        ([], [False, False, True, True, True]),
+    ])
+    async def test_matches_validate(self, roles, access):
+        rbac = self.rbac()
+        payload = {"roles": dict.fromkeys(roles)}
+        reqs = [IRBACValidate.parse_obj(i) for i in self.items]
+        batch = await rbac.validate_batch(None, reqs, payload=payload)
+        assert [i["access"] for i in batch] == access
+        for req, decision in zip(reqs, batch, strict=True):
+            assert await rbac.validate(None, req, payload=payload) == decision
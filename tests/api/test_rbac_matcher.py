@@ -0,0 +1,76 @@
+from app.rbac.matcher import RouteMatcher
+
+
+def matcher(*endpoints: str, method: str = "GET") -> RouteMatcher:
+    """resource ids are the endpoints themselves, added in the given order"""
+    return RouteMatcher.from_resources({i: {"method": method, "endpoint": i} for i in endpoints})
+
+
+class TestRouteMatcher:
+
+    def test_literal_over_uuid_over_str(self):
+        routes = matcher("/api/user/$str$", "/api/user/$uuid$", "/api/user/me")
+        assert routes.match("GET", "/api/user/me") == "/api/user/me"
+        assert routes.match("GET", "/api/user/5f0c0a3e") == "/api/user/$uuid$"
+        # without a `$uuid$` sibling `$str$` takes the segment
+        assert matcher("/api/user/$str$", "/api/user/me").match("GET", "/api/user/5f0c0a3e") == "/api/user/$str$"
+
+    def test_priority_is_per_segment_from_the_left(self):
+        routes = matcher("/api/$str$/settings", "/api/$uuid$/$str$", "/api/team/$str$")
+        assert routes.match("GET", "/api/team/settings") == "/api/team/$str$"
+        assert routes.match("GET", "/api/5f0c0a3e/settings") == "/api/$uuid$/$str$"
+
+    def test_backtracks_to_a_less_specific_branch(self):
+        routes = matcher("/api/user/me/avatar", "/api/user/$uuid$/roles")
+        assert routes.match("GET", "/api/user/me/roles") == "/api/user/$uuid$/roles"
+
+    def test_duplicates_keep_the_first_resource(self):
+        routes = RouteMatcher.from_resources({
+            "first": {"method": "GET", "endpoint": "/api/user/$uuid$"},
+            "second": {"method": "GET", "endpoint": "/api/user/$uuid$"},
+        })
+        assert routes.match("GET", "/api/user/5f0c0a3e") == "first"
+
+    def test_method(self):
+        routes = matcher("/api/user", method="POST")
+        assert routes.match("POST", "/api/user") == "/api/user"
+        assert routes.match("GET", "/api/user") is None
+
+    def test_no_match(self):
+        routes = matcher("/api/user/$uuid$")
+        assert routes.match("GET", "/api/user") is None
+        assert routes.match("GET", "/api/user/5f0c0a3e/roles") is None
+        assert routes.match("GET", "/api/user/a b") is None
+
+    def test_fallback_in_resource_order(self):
+        routes = matcher("/api/user/\\d+", "/api/user/.*", "/api/user/[0-9]+")
+        assert routes.match("GET", "/api/user/42") == "/api/user/\\d+"
+        assert routes.match("GET", "/api/user/me") == "/api/user/.*"
+
+    def test_fallback_placeholders(self):
+        routes = matcher("/api/(user|team)/$uuid$")
+        assert routes.match("GET", "/api/team/5f0c0a3e") == "/api/(user|team)/$uuid$"
+        assert routes.match("GET", "/api/role/5f0c0a3e") is None
+
+    def test_dotted_segment_goes_to_the_fallback(self):
+        routes = matcher("/api/v1.0/user")
+        assert routes.fallback["GET"] and "GET" not in routes.tries
+        assert routes.match("GET", "/api/v1.0/user") == "/api/v1.0/user"
+        # `.` is regex syntax there, as it was before the trie
+        assert routes.match("GET", "/api/v1x0/user") == "/api/v1.0/user"
+
+    def test_dotted_path_matches_placeholders(self):
+        routes = matcher("/api/file/$str$")
+        assert routes.match("GET", "/api/file/report.pdf") == "/api/file/$str$"
+
+    def test_trie_match_beats_the_fallback(self):
+        # the pattern comes first and matches every path below, the trie is still tried first
+        routes = matcher("/api/v1.*", "/api/v1/$str$", "/api/v1/user")
+        assert routes.match("GET", "/api/v1/user") == "/api/v1/user"
+        assert routes.match("GET", "/api/v1/team") == "/api/v1/$str$"
+        assert routes.match("GET", "/api/v1.0/user") == "/api/v1.*"
+
+    def test_invalid_pattern_is_skipped(self):
+        routes = matcher("/api/user/(", "/api/user/$uuid$")
+        assert routes.match("GET", "/api/user/5f0c0a3e") == "/api/user/$uuid$"
+        assert routes.match("GET", "/api/user/(") is None
@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+
+from core.refresh import RefreshCoordinator
+
+
+class Loader:
+    """refresh callable returning 1, 2, ... and counting its calls, each call waits for `release`"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.error = None
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return self.calls
+
+
+class TestRefreshCoordinator:
+
+    @pytest.mark.asyncio
+    async def test_single_flight(self):
+        refresher = RefreshCoordinator("test", max_age=60, max_stale=60)
+        loader = Loader()
+        pending = [asyncio.ensure_future(refresher.get(loader)) for _ in range(10)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        assert await asyncio.gather(*pending) == [1] * 10
+        assert loader.calls == 1
+        # fresh: no further loads
+        assert await refresher.get(loader) == 1 and loader.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self):
+        refresher = RefreshCoordinator("test", max_age=0, max_stale=60)
+        refresher.set("old")
+        loader = Loader()
+        refreshing = asyncio.ensure_future(refresher.get(loader))
+        await asyncio.sleep(0)
+        # the refresh is waiting for the loader, other requests get the current value meanwhile
+        assert [await refresher.get(loader) for _ in range(3)] == ["old"] * 3
+        assert loader.calls == 1 and refresher.stats()["refreshing"]
+        loader.release.set()
+        assert await refreshing == 1
+        assert refresher.value == 1 and not refresher.stats()["refreshing"]
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_the_last_value(self):
+        refresher = RefreshCoordinator("test", max_age=0, max_stale=60)
+        refresher.set("good")
+        loader = Loader()
+        loader.error = RuntimeError("database down")
+        loader.release.set()
+        assert await refresher.get(loader) == "good"
+        assert refresher.value == "good" and refresher.stats()["failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_past_max_stale_raises(self):
+        refresher = RefreshCoordinator("test", max_age=0, max_stale=0)
+        refresher.set("good")
+        loader = Loader()
+        loader.error = RuntimeError("database down")
+        loader.release.set()
+        with pytest.raises(RuntimeError):
+            await refresher.get(loader)
+
+    @pytest.mark.asyncio
+    async def test_failed_first_load_reaches_every_waiter(self):
+        refresher = RefreshCoordinator("test", max_age=60, max_stale=60)
+        loader = Loader()
+        loader.error = RuntimeError("database down")
+        pending = [asyncio.ensure_future(refresher.get(loader)) for _ in range(3)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        assert all(isinstance(i, RuntimeError) for i in results) and loader.calls == 1
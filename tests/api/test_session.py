@@ -1,4 +1,14 @@
+import json
+import time
 import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import delete
+
+from app import crud
+from app.sessions.model import Sessions
+from app.sessions.util import RevocationIndex
+from core.database.session import get_session
+from core.security import get_unverified_claims
 from tests.api.test_auth import Test as TestAuth
 
 
@@ -26,3 +36,93 @@ class Test:
     #     assert response.status_code == 200
     #     await self.auth.test_basic(test_client=test_client)
         # delattr(pytest, "test_token")
+
+
+@pytest.mark.usefixtures("test_client")
+class TestRevocation:
+    """access tokens stop validating once their session is gone, whichever way it was removed"""
+
+    def login(self, test_client) -> TestClient:
+        # a client of its own: a new `auth` cookie, so logging it out leaves the shared test session alone
+        client = TestClient(test_client.app)
+        response = client.post("api/auth/v1/auth/basic", data={
+            "username": pytest.test_username, "password": pytest.test_password})
+        assert response.status_code == 201
+        client.headers["Authorization"] = f"Bearer {response.json()['data']['access_token']}"
+        return client
+
+    def is_valid(self, client: TestClient) -> bool:
+        response = client.post(
+            "api/auth/v1/rbac/validate", data=json.dumps({"method": "get", "endpoint": "/api/auth/v1/test"}))
+        assert response.status_code in (200, 401)
+        return response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_logout(self, test_client):
+        client = self.login(test_client)
+        assert self.is_valid(client)
+        assert client.get("api/auth/v1/auth/logout").status_code == 200
+        assert not self.is_valid(client)
+
+    @pytest.mark.asyncio
+    async def test_delete(self, test_client):
+        client = self.login(test_client)
+        assert self.is_valid(client)
+        session_id = get_unverified_claims(client.headers["Authorization"].split()[1])["sid"]
+        response = test_client.delete(
+            f"api/auth/v1/sessions/{session_id}", headers={"Authorization": f"Bearer {pytest.test_token}"})
+        assert response.status_code == 200
+        assert not self.is_valid(client)
+
+    @pytest.mark.asyncio
+    async def test_delete_outside_the_api(self, test_client):
+        """a row deleted by SQL, as by the admin panel or a cascade, is revoked by the trigger"""
+        client = self.login(test_client)
+        assert self.is_valid(client)
+        session_id = get_unverified_claims(client.headers["Authorization"].split()[1])["sid"]
+
+        async def remove():
+            async for db_session in get_session():
+                await db_session.execute(delete(Sessions).where(Sessions.id == session_id))
+                await db_session.commit()
+                # what every worker does at its next SESSION_REVOCATION_SYNC_SECONDS sync
+                await crud.sessions.load_revocations(db_session)
+
+        test_client.portal.call(remove)
+        assert not self.is_valid(client)
+
+
+class TestRevocationIndex:
+
+    def test_removed_session(self):
+        index = RevocationIndex()
+        now = int(time.time())
+        index.add("session", now + 1, now + 600)
+        assert index.is_revoked("session", now, "jti")
+        assert not index.is_revoked("session", now + 1, "jti")
+        assert not index.is_revoked("other", now, "jti")
+
+    def test_refresh_in_the_same_second(self):
+        index = RevocationIndex()
+        now = int(time.time())
+        # refreshed at `now`: the new token `new` stays valid, older ones of the same second do not
+        index.add("session", now + 1, now + 600, "new")
+        assert not index.is_revoked("session", now, "new")
+        assert index.is_revoked("session", now, "old")
+        # removed after the refresh: the new token goes too
+        index.add("session", now + 1, now + 600)
+        assert index.is_revoked("session", now, "new")
+
+    def test_older_revocation_does_not_override(self):
+        index = RevocationIndex()
+        now = int(time.time())
+        index.add("session", now + 1, now + 600)
+        index.add("session", now - 10, now + 900, "stale")
+        assert index.revocations["session"] == (now + 1, now + 900, None)
+
+    def test_expired(self):
+        index = RevocationIndex()
+        now = int(time.time())
+        index.add("session", now + 1, now - 1)
+        assert not index.is_revoked("session", now, "jti")
+        assert "session" not in index.revocations
@@ -0,0 +1,35 @@
+import pytest
+from pydantic import ValidationError
+
+from core.settings import settings, Settings, SecretsSchema
+
+
+def environment() -> dict:
+    """the current secrets as the environment or a secret store holds them, strings only"""
+    values = {k: getattr(settings, k) for k in SecretsSchema.__fields__}
+    return {k: v if isinstance(v, str) else str(v) for k, v in values.items() if v is not None}
+
+
+class TestSettings:
+
+    @pytest.mark.parametrize("version", ["1", "2"])
+    def test_claims_version_from_string(self, monkeypatch, version):
+        for key, value in {**environment(), "ACCESS_TOKEN_CLAIMS_VERSION": version}.items():
+            monkeypatch.setenv(key, value)
+        assert Settings().ACCESS_TOKEN_CLAIMS_VERSION == int(version)
+
+    def test_string_values(self):
+        secrets = SecretsSchema.parse_obj({
+            **environment(),
+            "ACCESS_TOKEN_CLAIMS_VERSION": "2",
+            "TOKEN_CACHE_TTL": "30",
+            "JWKS_MAX_AGE": "300",
+            "VISIBILITY_GROUP_RESOLVER": "sql",
+        })
+        assert secrets.ACCESS_TOKEN_CLAIMS_VERSION == 2
+        assert secrets.TOKEN_CACHE_TTL == 30 and secrets.JWKS_MAX_AGE == 300
+
+    @pytest.mark.parametrize("version", ["0", "3", "v2"])
+    def test_claims_version_out_of_range(self, version):
+        with pytest.raises(ValidationError):
+            SecretsSchema.parse_obj({**environment(), "ACCESS_TOKEN_CLAIMS_VERSION": version})
@@ -3,6 +3,9 @@ import random
 import string
 import pytest
 
+from core.constants import VISIBILITY_GROUP_ENTITY_POSSIBLE_VALUES
+from core.database.session import get_session
+
 
 @pytest.mark.usefixtures("test_client")
 class Test:
@@ -65,3 +68,66 @@ class Test:
     async def test_get_settings(self, test_client):
         response = test_client.get(f"{self.url}/settings", headers={"Authorization": f"Bearer {pytest.test_token}"})
         assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_resolvers_match(self, test_client):
+        """
+        the SQL resolver sees the same users as the in-memory one, siblings like `<base>sub` excluded
+        and the caller kept as owner in a group without admin
+        """
+        headers = {"Authorization": f"Bearer {pytest.test_token}"}
+        base = f"test/{''.join(random.choices(string.ascii_lowercase + string.digits, k=10))}"
+        users = []
+        for _ in range(4):
+            name = ''.join(random.choices(string.ascii_letters + string.digits, k=10))
+            data = {"first_name": name, "full_name": name, "email": f"{name}@hostname.com"}
+            response = test_client.post("/api/auth/v1/user", headers=headers, json=data)
+            assert response.status_code == 200
+            users.append(response.json()["data"])
+        groups = [
+            {"prefix": base, "opportunity": ["child", "user"], "seller": ["owner"], "admin": users[0]["id"]},
+            {"prefix": f"{base}/sub", "opportunity": ["parent", "owner"], "seller": ["admin", "parent"],
+             "admin": users[1]["id"]},
+            {"prefix": f"{base}/sub/leaf", "opportunity": ["parent"], "seller": ["child", "user"]},
+            {"prefix": f"{base}/no-admin", "opportunity": ["admin", "owner"], "seller": ["admin", "owner", "parent"]},
+            {"prefix": f"{base}sub", "opportunity": ["parent"], "seller": ["parent"]},
+        ]
+        # the last group, the `<base>sub` sibling, has no member
+        for group, user in zip(groups, users + [None], strict=True):
+            response = test_client.post(self.url, headers=headers, json=group)
+            assert response.status_code == 200
+            group["id"] = response.json()["data"]["id"]
+            if user:
+                response = test_client.patch(
+                    f"/api/auth/v1/user/{user['id']}/visibility_group/{group['id']}", headers=headers)
+                assert response.status_code == 200
+
+        async def resolve():
+            results = {}
+            visibility_group = test_client.app.visibility_group
+            async for db_session in get_session():
+                visibility_group.refresher.set(await visibility_group.update(db_session))
+                for group in groups:
+                    for user in users:
+                        payload = {"user_id": user["id"], "email": user["email"], "visibility_group": group["prefix"]}
+                        for entity in VISIBILITY_GROUP_ENTITY_POSSIBLE_VALUES:
+                            results[(group["prefix"], user["id"], entity)] = (
+                                await visibility_group.resolve_memory(db_session, entity, payload),
+                                await visibility_group.resolve_sql(db_session, entity, payload),
+                            )
+            return results
+
+        try:
+            results = test_client.portal.call(resolve)
+            assert any(memory for memory, _ in results.values())
+            # the member of the group without admin sees their own sellers, no ancestor grants more
+            _, sql = results[(f"{base}/no-admin", users[3]["id"], "seller")]
+            assert [str(i["id"]) for i in sql] == [users[3]["id"]]
+            for memory, sql in results.values():
+                assert sorted(str(i["id"]) for i in memory) == sorted(str(i["id"]) for i in sql)
+        finally:
+            for user in users:
+                test_client.delete(f"/api/auth/v1/user/{user['id']}", headers=headers)
+            for group in groups:
+                if "id" in group:
+                    test_client.delete(f"{self.url}/{group['id']}", headers=headers)